@@ -1,18 +1,26 @@
 import streamlit as st
-import pandas as pd
-import os
-from event_agent import agno_agent
-from datetime import datetime
+import numpy as np
+import itertools
+from event_agent import agno_agent_stream, dispatch, event_ranking, event_search, store
+from data_cache import DataCache
+from event_ranking import SORTS
 
-# ----------------- Paths & CSVs -----------------
-csv_path = "csv_files/"
-events_file = os.path.join(csv_path, 'Events.csv')
-attendees_file = os.path.join(csv_path, 'Attendee.csv')
-bookings_file = os.path.join(csv_path, 'Bookings.csv')
+# ----------------- Data -----------------
+# Writes are journaled by the shared store, so read through it rather
+# than the CSV snapshots, which lag until the next compaction.
+# Streamlit reruns this script on every interaction in every session,
+# so per-rerun reads use the store's indexed lookups; the attendee frame
+# (needed only on login/register) comes from one process-wide cache that
+# is rebuilt only when the store's version changes.
+@st.cache_resource
+def shared_data():
+    return DataCache(store)
 
-events = pd.read_csv(events_file)
-attendees = pd.read_csv(attendees_file)
-bookings = pd.read_csv(bookings_file)
+# Events rendered per page of the "Available Events" list
+EVENTS_PER_PAGE = 20
+
+data = shared_data()
+events = data.events()
 
 # ----------------- Streamlit Config -----------------
 st.set_page_config(
@@ -140,13 +148,13 @@ st.markdown("""
 
 # ----------------- Helper Functions -----------------
 def get_user_stats(email):
-    attendee = attendees[attendees['Email'] == email]
-    if attendee.empty:
+    # Indexed store lookups; this runs on every rerun
+    attendee = store.attendee_by_email(email)
+    if attendee is None:
         return 0, 0
     
-    attendee_id = attendee['AttendeeID'].values[0]
-    user_bookings = bookings[bookings['AttendeeID'] == attendee_id]
-    active = len(user_bookings[user_bookings['Status'] == 'Registered'])
+    user_bookings = store.bookings_for_attendee(attendee['AttendeeID'])
+    active = sum(booking['Status'] == 'Registered' for booking in user_bookings)
     total = len(user_bookings)
     
     return active, total
@@ -160,6 +168,9 @@ if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 if 'show_ai_features' not in st.session_state:
     st.session_state.show_ai_features = True
+if 'events_page' not in st.session_state:
+    st.session_state.events_page = 0
+    st.session_state.events_view = None
 
 # ----------------- Sidebar -----------------
 with st.sidebar:
@@ -236,6 +247,7 @@ if st.session_state.email == "":
             submit_login = st.form_submit_button("Login", use_container_width=True)
             
             if submit_login:
+                attendees = data.attendees()
                 user = attendees[attendees['Email'].str.lower() == email_login.strip().lower()]
                 if user.empty:
                     st.error("❌ Email not found. Please register first.")
@@ -255,14 +267,10 @@ if st.session_state.email == "":
             if submit_register:
                 if email_register.strip() == "" or name_register.strip() == "":
                     st.error("❌ Please fill in all fields.")
-                elif email_register.strip().lower() in attendees['Email'].str.lower().values:
+                elif email_register.strip().lower() in data.attendees()['Email'].str.lower().values:
                     st.error("❌ Email already registered. Please login.")
                 else:
-                    new_id = f"A{len(attendees)+1:03}"
-                    new_attendee = pd.DataFrame([[new_id, name_register.strip(), email_register.strip()]], 
-                                               columns=['AttendeeID', 'Name', 'Email'])
-                    attendees = pd.concat([attendees, new_attendee], ignore_index=True)
-                    attendees.to_csv(attendees_file, index=False)
+                    store.add_attendee(name_register.strip(), email_register.strip())
                     st.session_state.email = email_register.strip()
                     st.session_state.name = name_register.strip()
                     st.success(f"✅ Account created! Welcome, {st.session_state.name}!")
@@ -289,53 +297,47 @@ else:
         
         with col1:
             if st.button("🎯 Get AI Recommendations", use_container_width=True):
-                prompt = f"Recommend events for me (Name: {st.session_state.name}, Email: {st.session_state.email})"
                 with st.spinner("🤖 AI analyzing your preferences..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("recommend", name=st.session_state.name, email=st.session_state.email).reply
                     st.session_state.chat_history.append({"user": "Get recommendations", "bot": response})
                     st.info(response)
         
             if st.button("⚡ AI Auto-Book Priority Events", use_container_width=True):
-                prompt = f"Auto book priority events for me (Name: {st.session_state.name}, Email: {st.session_state.email})"
                 with st.spinner("🤖 AI finding perfect matches..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("auto_book", name=st.session_state.name, email=st.session_state.email).reply
                     st.session_state.chat_history.append({"user": "Auto-book", "bot": response})
                     st.warning(response)
         
         with col2:
             if st.button("📅 Check Overbooking Risk", use_container_width=True):
-                prompt = f"Check if I'm overbooking (Name: {st.session_state.name}, Email: {st.session_state.email})"
                 with st.spinner("🤖 AI checking your schedule..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("overbooking_check", name=st.session_state.name, email=st.session_state.email).reply
                     st.session_state.chat_history.append({"user": "Overbook check", "bot": response})
                     st.success(response)
             
             if st.button("📋 My Bookings + AI Insights", use_container_width=True):
-                prompt = f"Show my bookings (Name: {st.session_state.name}, Email: {st.session_state.email})"
                 with st.spinner("Loading your bookings..."):
-                    response = agno_agent(prompt)
-                    st.session_state.chat_history.append({"user": "Show bookings", "bot": response})
-                    if isinstance(response, list):
-                        for booking in response:
+                    result = dispatch("my_bookings", name=st.session_state.name, email=st.session_state.email)
+                    st.session_state.chat_history.append({"user": "Show bookings", "bot": result.reply})
+                    if result.ok:
+                        for booking in result.data:
                             st.write(f"✅ {booking['EventName']} - {booking['Date']}")
                     else:
-                        st.write(response)
+                        st.write(result.reply)
     
     with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
             if st.button("📊 AI Seat Optimization Report", use_container_width=True):
-                prompt = "Show seat optimization report"
                 with st.spinner("🤖 AI optimizing seat allocation..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("seat_report").reply
                     st.session_state.chat_history.append({"user": "Optimization report", "bot": response})
                     st.info(response)
             
             if st.button("📁 AI Event Clustering", use_container_width=True):
-                prompt = "Cluster events by category"
                 with st.spinner("🤖 AI categorizing events..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("cluster").reply
                     st.session_state.chat_history.append({"user": "Cluster events", "bot": response})
                     st.success(response)
         
@@ -343,9 +345,8 @@ else:
             event_for_prediction = st.selectbox("Select event for AI prediction:", 
                                                events['EventName'].tolist())
             if st.button("🔮 Predict Attendance", use_container_width=True):
-                prompt = f"Predict attendance for {event_for_prediction}"
                 with st.spinner("🤖 AI analyzing trends..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("forecast", event=event_for_prediction).reply
                     st.session_state.chat_history.append({"user": f"Predict {event_for_prediction}", "bot": response})
                     st.info(response)
     
@@ -354,16 +355,14 @@ else:
         
         with col1:
             if st.button("🔔 View Auto-Scheduled Notifications", use_container_width=True):
-                prompt = f"Show notification schedule (Name: {st.session_state.name}, Email: {st.session_state.email})"
                 with st.spinner("🤖 Loading AI notifications..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("notifications", name=st.session_state.name, email=st.session_state.email).reply
                     st.session_state.chat_history.append({"user": "Notification schedule", "bot": response})
                     st.success(response)
             
             if st.button("📅 AI Schedule Conflict Check", use_container_width=True):
-                prompt = f"Check my schedule for conflicts (Name: {st.session_state.name}, Email: {st.session_state.email})"
                 with st.spinner("🤖 AI checking for conflicts..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("schedule_check", name=st.session_state.name, email=st.session_state.email).reply
                     st.session_state.chat_history.append({"user": "Check schedule", "bot": response})
                     st.success(response)
         
@@ -372,9 +371,8 @@ else:
                 if len(events) >= 2:
                     event1 = events.iloc[0]['EventName']
                     event2 = events.iloc[1]['EventName']
-                    prompt = f"Compare {event1} and {event2}"
                     with st.spinner("🤖 AI comparing events..."):
-                        response = agno_agent(prompt)
+                        response = dispatch("compare", event=event1, event2=event2).reply
                         st.session_state.chat_history.append({"user": f"Compare events", "bot": response})
                         st.info(response)
                 else:
@@ -423,24 +421,43 @@ else:
     with col1:
         search_term = st.text_input("🔍 Search events (AI-enhanced)", placeholder="Try: 'tech events' or 'evening events'")
     with col2:
-        sort_by = st.selectbox("Sort by", ["AI Recommended", "Date", "Name", "Availability"])
+        sort_by = st.selectbox("Sort by", SORTS)
+    
+    # Popularity of every event at once, from the store's registered counts
+    catalog, registered = store.seat_counts()
+    capacity = catalog.capacity
+    popularity = np.zeros(len(capacity), dtype=np.int64)
+    has_seats = capacity > 0
+    popularity[has_seats] = (registered[has_seats] / capacity[has_seats] * 100).astype(np.int64)
     
-    # Filter events
-    filtered_events = events.copy()
-    if search_term:
-        filtered_events = filtered_events[
-            filtered_events['EventName'].str.contains(search_term, case=False) |
-            filtered_events['Venue'].str.contains(search_term, case=False)
-        ]
+    # Only one page of events gets widgets; a new search or sort starts at page 1
+    if st.session_state.events_view != (search_term, sort_by):
+        st.session_state.events_view = (search_term, sort_by)
+        st.session_state.events_page = 0
+    shown = (st.session_state.events_page + 1) * EVENTS_PER_PAGE
+    
+    # Filter events through the search index, then put them in the chosen
+    # order from precomputed sort indexes; only the pages up to this one
+    # are ordered. A search sorted by "AI Recommended" keeps its relevance
+    # order, which already reflects what the user asked for.
+    if search_term.strip() and sort_by == "AI Recommended":
+        positions, matches = event_search.search(search_term, catalog, limit=shown)
+    else:
+        positions, matches = (event_search.search(search_term, catalog) if search_term.strip()
+                              else (None, len(catalog.rows)))
+        positions = event_ranking.order(sort_by, catalog, st.session_state.email, positions, limit=shown)
+    pages = max(1, -(-matches // EVENTS_PER_PAGE))
+    page = min(st.session_state.events_page, pages - 1)
+    page_positions = positions[page * EVENTS_PER_PAGE:(page + 1) * EVENTS_PER_PAGE]
+    page_events = catalog.events.iloc[page_positions].assign(Popularity=popularity[page_positions])
     
     # Display events
-    for idx, row in filtered_events.iterrows():
+    for idx, row in page_events.iterrows():
         col1, col2 = st.columns([4, 1])
         
         with col1:
-            # Calculate AI score (simple popularity)
-            booked = len(bookings[(bookings['EventID'] == row['EventID']) & (bookings['Status'] == 'Registered')])
-            popularity = int((booked / row['Capacity']) * 100) if row['Capacity'] > 0 else 0
+            # AI score (simple popularity)
+            popularity = row['Popularity']
             
             ai_insight = ""
             if popularity > 70:
@@ -459,15 +476,28 @@ else:
         with col2:
             st.markdown("<br>", unsafe_allow_html=True)
             if st.button(f"🤖 AI Register", key=f"reg_{row['EventID']}", use_container_width=True):
-                prompt = f"Register me for {row['EventName']} (Name: {st.session_state.name}, Email: {st.session_state.email})"
                 with st.spinner("🤖 AI checking conflicts & availability..."):
-                    response = agno_agent(prompt)
+                    response = dispatch("register", name=st.session_state.name, email=st.session_state.email,
+                                        event=row['EventName']).reply
                     st.toast(response, icon="🤖")
                     st.session_state.chat_history.append({"user": f"Register for {row['EventName']}", "bot": response})
                     if "✅" in response:
                         st.balloons()
                     st.rerun()
     
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("◀ Previous", disabled=page == 0, use_container_width=True):
+            st.session_state.events_page = page - 1
+            st.rerun()
+    with page_col:
+        st.markdown(f"<p style='text-align: center;'>Page {page + 1} of {pages} · {matches} events</p>",
+                    unsafe_allow_html=True)
+    with next_col:
+        if st.button("Next ▶", disabled=page >= pages - 1, use_container_width=True):
+            st.session_state.events_page = page + 1
+            st.rerun()
+    
     st.markdown("<br><br>", unsafe_allow_html=True)
     
     # AI Chat Interface
@@ -509,13 +539,15 @@ else:
     if send_button and user_prompt:
         full_prompt = f"{user_prompt} (Name: {st.session_state.name}, Email: {st.session_state.email})"
         
+        # Spinner only until the first chunk; text replies then stream in
+        chunks = agno_agent_stream(full_prompt)
         with st.spinner("🤖 AI is thinking..."):
-            response = agno_agent(full_prompt)
-        
-        st.session_state.chat_history.append({"user": user_prompt, "bot": response})
+            first = next(chunks, "")
         
         # Display response
-        if isinstance(response, list):
+        if isinstance(first, list):
+            chunks.close()
+            response = first
             st.markdown("#### 📋 AI Results:")
             for ev in response:
                 st.markdown(f"""
@@ -526,12 +558,10 @@ else:
                     </div>
                 """, unsafe_allow_html=True)
         else:
-            st.markdown(f"""
-                <div class="ai-suggestion">
-                    <strong>🤖 AI Response:</strong><br>
-                    {response}
-                </div>
-            """, unsafe_allow_html=True)
+            st.markdown("**🤖 AI Response:**")
+            response = st.write_stream(itertools.chain([first], chunks))
+        
+        st.session_state.chat_history.append({"user": user_prompt, "bot": response})
     
     # Chat History
     if st.session_state.chat_history:
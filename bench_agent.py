@@ -0,0 +1,242 @@
+import argparse
+import functools
+import inspect
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+import numpy as np
+
+STAGES = ("routing", "data", "model", "other")
+
+# Filled in by main(): event_agent loads its store at import time, so it
+# is imported only after EVENT_DATA_DIR points at a scratch copy of the
+# data (the corpus registers and cancels).
+ea = None
+
+
+class RequestProbe:
+    """Per-request counters fed by the wrappers installed in instrument().
+
+    Time is charged to the outermost wrapped stage only, so a store
+    lookup made while routing counts as routing. Calls from other threads
+    (background compaction) are ignored.
+    """
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.reset()
+
+    def reset(self):
+        self.times = Counter()
+        self.depth = 0
+        self.model_calls = 0
+        self.prompt_chars = 0
+        self.routed = False
+        self.intent = None
+
+    def timed(self, stage, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if self.depth or threading.get_ident() != self.thread:
+                return fn(*args, **kwargs)
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.times[stage] += time.perf_counter() - start
+                self.depth -= 1
+        return wrapper
+
+
+def instrument(probe):
+    """Wrap the agent's routing, store, retrieval and model entry points"""
+    for name, member in inspect.getmembers(type(ea.store), inspect.isfunction):
+        if not name.startswith('_') and name not in ('add_listener', 'start_compaction', 'compact', 'reload'):
+            setattr(ea.store, name, probe.timed("data", getattr(ea.store, name)))
+    ea.retriever.top_k = probe.timed("data", ea.retriever.top_k)
+    ea.event_context.render = probe.timed("data", ea.event_context.render)
+    ea.event_context.lines_for = probe.timed("data", ea.event_context.lines_for)
+
+    route_intent = ea.route_intent
+
+    def routed(prompt, resolve_event, today=None):
+        data = route_intent(prompt, resolve_event, today)
+        probe.routed = data is not None
+        return data
+    ea.route_intent = probe.timed("routing", routed)
+
+    generate = ea.llm.generate
+
+    def counted(prompt, schema=None, hedge=False):
+        probe.model_calls += 1
+        probe.prompt_chars += len(prompt)
+        return generate(prompt, schema, hedge)
+    ea.llm.generate = probe.timed("model", counted)
+
+    dispatch = ea.dispatch
+
+    def recorded(action, *args, **kwargs):
+        probe.intent = action
+        return dispatch(action, *args, **kwargs)
+    ea.dispatch = recorded
+
+
+def load_corpus(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def fill(template, event_names):
+    """Replace {event}/{event2} with real catalog names"""
+    return template.format(event=event_names[0], event2=event_names[1 % len(event_names)])
+
+
+# ----------------- Reporting -----------------
+def summarize(rows):
+    totals = [row['total'] for row in rows]
+    summary = {
+        'requests': len(rows),
+        'p50_ms': float(np.percentile(totals, 50)) * 1000,
+        'p95_ms': float(np.percentile(totals, 95)) * 1000,
+        'model_calls_per_request': sum(row['model_calls'] for row in rows) / len(rows),
+        'prompt_tokens_per_request': sum(row['prompt_tokens'] for row in rows) / len(rows),
+        'routed_pct': 100.0 * sum(row['routed'] for row in rows) / len(rows),
+        'agreement_pct': 100.0 * sum(row['agree'] for row in rows) / len(rows),
+    }
+    for stage in STAGES:
+        summary[f'{stage}_ms'] = 1000 * sum(row[stage] for row in rows) / len(rows)
+    return summary
+
+
+def print_table(title, groups):
+    header = (f"{title:<20}{'n':>5}{'p50 ms':>9}{'p95 ms':>9}" + "".join(f"{stage + ' ms':>11}" for stage in STAGES)
+              + f"{'calls':>7}{'tokens':>8}{'routed%':>9}{'agree%':>8}")
+    print(header)
+    print("-" * len(header))
+    for name, summary in groups:
+        print(f"{name:<20}{summary['requests']:>5}{summary['p50_ms']:>9.1f}{summary['p95_ms']:>9.1f}"
+              + "".join(f"{summary[stage + '_ms']:>11.1f}" for stage in STAGES)
+              + f"{summary['model_calls_per_request']:>7.2f}{summary['prompt_tokens_per_request']:>8.0f}"
+              f"{summary['routed_pct']:>9.0f}{summary['agreement_pct']:>8.0f}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a prompt corpus through agno_agent against a stubbed model")
+    parser.add_argument("--corpus", default="bench_prompts.jsonl",
+                        help="JSONL of {prompt, intent, source}; {event}/{event2} are filled from the catalog")
+    parser.add_argument("--data", default="csv_files", help="folder of CSVs to copy and run against")
+    parser.add_argument("--backend", choices=["stub", "replay"], default="stub")
+    parser.add_argument("--recordings", default="llm_recordings.jsonl", help="replay backend recordings")
+    parser.add_argument("--latency", type=float, default=0.8, help="synthetic model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.4, help="extra random latency, up to this many seconds")
+    parser.add_argument("--repeat", type=int, default=2, help="passes over the corpus (later ones can hit caches)")
+    parser.add_argument("--no-cache", action="store_true", help="clear the response cache before every request")
+    parser.add_argument("--email", help="user to send prompts as (default: first attendee)")
+    parser.add_argument("--json", help="also write per-request rows and summaries to this file")
+    parser.add_argument("--agent-log", help="keep the agent's log in this file (default: discard it)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_agent_", ignore_cleanup_errors=True) as scratch:
+        bench(args, scratch)
+
+
+def bench(args, scratch):
+    """Run the corpus against a copy of args.data in scratch and print the report"""
+    global ea
+    for name in ('Events.csv', 'Attendee.csv', 'Bookings.csv'):
+        shutil.copy(os.path.join(args.data, name), scratch)
+    os.environ["EVENT_DATA_DIR"] = scratch
+    os.environ["LLM_BACKEND"] = "stub"
+    import event_agent
+    import telemetry
+    from llm_backends import make_backend
+    ea = event_agent
+    ea.llm.backend = make_backend(args.backend, recordings=args.recordings,
+                                  latency=args.latency, jitter=args.jitter)
+
+    attendee = (ea.store.attendee_by_email(args.email) if args.email
+                else ea.store.attendees_frame().iloc[0].to_dict())
+    event_names = ea.store.event_names()
+    corpus = load_corpus(args.corpus)
+    probe = RequestProbe()
+    instrument(probe)
+
+    rows = []
+    # The agent's log stays out of the report, in --agent-log if given
+    if args.agent_log:
+        log = logging.FileHandler(args.agent_log, mode='w', encoding='utf-8')
+        log.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    else:
+        log = logging.NullHandler()
+    telemetry.log.addHandler(log)
+    telemetry.log.propagate = False
+    for run in range(args.repeat):
+        for item in corpus:
+            if args.no_cache:
+                ea.response_cache.clear()
+            prompt = fill(item['prompt'], event_names)
+            probe.reset()
+            start = time.perf_counter()
+            ea.agno_agent(f"{prompt} (Name: {attendee['Name']}, Email: {attendee['Email']})")
+            total = time.perf_counter() - start
+            predicted = probe.intent or "conversational"
+            row = {
+                'run': run,
+                'prompt': prompt,
+                'source': item.get('source', ''),
+                'intent': item['intent'],
+                'predicted': predicted,
+                'agree': predicted == item['intent'],
+                'routed': probe.routed,
+                'total': total,
+                'model_calls': probe.model_calls,
+                # Rough token estimate: ~4 characters per token
+                'prompt_tokens': probe.prompt_chars // 4,
+            }
+            for stage in STAGES[:-1]:
+                row[stage] = probe.times[stage]
+            row['other'] = max(0.0, total - sum(probe.times.values()))
+            rows.append(row)
+
+    telemetry.log.removeHandler(log)
+    log.close()
+
+    by_intent = defaultdict(list)
+    by_source = defaultdict(list)
+    by_run = defaultdict(list)
+    for row in rows:
+        by_intent[row['intent']].append(row)
+        by_source[row['source']].append(row)
+        by_run[f"pass {row['run'] + 1}"].append(row)
+
+    print(f"{len(corpus)} prompts x {args.repeat} passes, backend={args.backend}, "
+          f"latency={args.latency}s+{args.jitter}s, cache={'off' if args.no_cache else 'on'}"
+          + (f", agent log: {args.agent_log}" if args.agent_log else "") + "\n")
+    print_table("intent", [(name, summarize(group)) for name, group in sorted(by_intent.items())])
+    print_table("source", [(name, summarize(group)) for name, group in sorted(by_source.items())])
+    print_table("pass", [(name, summarize(group)) for name, group in by_run.items()] + [("all", summarize(rows))])
+
+    mismatches = Counter((row['intent'], row['predicted']) for row in rows if not row['agree'])
+    if mismatches:
+        print("Intent disagreements (expected -> got):")
+        for (expected, got), count in mismatches.most_common():
+            print(f"  {expected} -> {got}: {count}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'summary': summarize(rows),
+                'by_intent': {name: summarize(group) for name, group in by_intent.items()},
+                'rows': rows,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Filled in by main(): event_agent loads its store at import time, so it
+# is imported only after EVENT_DATA_DIR points at a scratch copy of the
+# benchmark data. Writes (register/cancel) are journaled into the copy,
+# so the data passed in is left as it was and every run starts the same.
+ea = None
+args = None
+rng = random.Random(0)
+event_names = []
+emails = []
+run_id = f"{os.getpid()}-{int(time.time())}"
+registered = []
+
+
+# ----------------- Inputs -----------------
+def pick_event(i):
+    return event_names[rng.randrange(len(event_names))]
+
+
+def pick_email(i):
+    return emails[i % len(emails)]
+
+
+def register(i):
+    email = f"bench-{run_id}-{i}@example.com"
+    event = pick_event(i)
+    result = ea.register_attendee("Bench User", email, event)
+    if result.startswith("✅"):
+        registered.append((email, event))
+    return result
+
+
+def cancel(i):
+    if not registered:
+        return None
+    email, event = registered.pop()
+    return ea.cancel_booking(email, event)
+
+
+def typo(name):
+    """An event name with two adjacent letters swapped"""
+    if len(name) < 4:
+        return name
+    pos = rng.randrange(1, len(name) - 2)
+    return name[:pos] + name[pos + 1] + name[pos] + name[pos + 2:]
+
+
+BENCHMARKS = [
+    ("seats_left", lambda i: ea.seats_left(pick_event(i))),
+    ("find_event", lambda i: ea.find_event(pick_event(i).lower())),
+    ("suggest_event", lambda i: ea.suggest_event(typo(pick_event(i)))),
+    ("get_user_bookings", lambda i: ea.get_user_bookings(pick_email(i))),
+    ("get_event_context", lambda i: ea.get_event_context()),
+    ("get_event_context_query", lambda i: ea.get_event_context(f"seats for {pick_event(i)}")),
+    ("register_attendee", register),
+    ("cancel_booking", cancel),
+]
+
+
+# ----------------- Measurement -----------------
+def percentile(samples, pct):
+    return float(np.percentile(samples, pct)) if samples else 0.0
+
+
+def run(name, fn):
+    for i in range(min(10, args.iterations)):
+        fn(i)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        call_start = time.perf_counter_ns()
+        fn(i)
+        latencies.append((time.perf_counter_ns() - call_start) / 1000)
+    total = time.perf_counter() - start
+
+    # Separate, shorter pass for memory: tracemalloc slows every allocation
+    tracemalloc.start()
+    for i in range(args.memory_iterations):
+        fn(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'name': name,
+        'calls': args.iterations,
+        'ops_per_sec': args.iterations / total if total else 0.0,
+        'p50_us': percentile(latencies, 50),
+        'p95_us': percentile(latencies, 95),
+        'p99_us': percentile(latencies, 99),
+        'max_us': max(latencies) if latencies else 0.0,
+        'peak_kib': peak / 1024,
+    }
+
+
+def scratch_copy(data_dir, scratch):
+    """Copy the data files in data_dir to the scratch folder"""
+    for name in os.listdir(data_dir):
+        base, ext = os.path.splitext(name)
+        if (base in ('Events', 'Attendee', 'Bookings') and ext in ('.csv', '.arrow', '.journal')
+                or name == 'events.db'):
+            shutil.copy(os.path.join(data_dir, name), scratch)
+
+
+def load(data_dir, backend):
+    """Import event_agent against data_dir; returns (seconds, RSS growth in bytes)"""
+    global ea
+    os.environ["EVENT_DATA_DIR"] = data_dir
+    os.environ["EVENT_STORE_BACKEND"] = backend
+    os.environ.setdefault("LLM_BACKEND", "stub")
+    rss_before = max_rss()
+    start = time.perf_counter()
+    import event_agent
+    seconds = time.perf_counter() - start
+    ea = event_agent
+    return seconds, max_rss() - rss_before
+
+
+def max_rss():
+    """Peak resident set size in bytes (0 where unavailable)"""
+    if resource is None:
+        return 0
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def main():
+    global args, event_names, emails
+    parser = argparse.ArgumentParser(description="Time the event_agent data-layer functions")
+    parser.add_argument("data_dir", help="folder with Events.csv, Attendee.csv and Bookings.csv "
+                                         "(see synthetic_data.py)")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--iterations", type=int, default=1000, help="calls per function")
+    parser.add_argument("--memory-iterations", type=int, default=50, help="calls per function while tracing memory")
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # The copy can be gigabytes at benchmark scale; don't leave it behind
+    with tempfile.TemporaryDirectory(prefix="bench_data_layer_", ignore_cleanup_errors=True) as scratch:
+        scratch_copy(args.data_dir, scratch)
+        load_seconds, load_rss = load(scratch, args.backend)
+        rng.seed(args.seed)
+        event_names = ea.store.event_names()
+        attendees = ea.store.attendees_frame()
+        emails = attendees['Email'].sample(n=min(args.iterations, len(attendees)), random_state=args.seed).tolist()
+
+        counts = (len(event_names), len(attendees), len(ea.store.bookings_frame()))
+        print(f"Data: {args.data_dir} ({counts[0]} events, {counts[1]} attendees, {counts[2]} bookings), "
+              f"backend={args.backend}")
+        print(f"Load: {load_seconds:.2f}s, RSS +{load_rss / 2 ** 20:.1f} MiB\n")
+
+        results = []
+        header = f"{'benchmark':<26}{'ops/s':>11}{'p50 µs':>11}{'p95 µs':>11}{'p99 µs':>11}{'max µs':>11}{'peak KiB':>11}"
+        print(header)
+        print("-" * len(header))
+        for name, fn in BENCHMARKS:
+            if args.only and name not in args.only:
+                continue
+            result = run(name, fn)
+            results.append(result)
+            print(f"{name:<26}{result['ops_per_sec']:>11.1f}{result['p50_us']:>11.1f}{result['p95_us']:>11.1f}"
+                  f"{result['p99_us']:>11.1f}{result['max_us']:>11.1f}{result['peak_kib']:>11.1f}")
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'data_dir': args.data_dir,
+                    'backend': args.backend,
+                    'rows': dict(zip(('events', 'attendees', 'bookings'), counts)),
+                    'load_seconds': load_seconds,
+                    'load_rss_bytes': load_rss,
+                    'results': results,
+                }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
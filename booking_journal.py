@@ -0,0 +1,79 @@
+import json
+import os
+
+
+class BookingJournal:
+    """Append-only JSON-lines log of attendee and booking changes.
+
+    Every entry is flushed and fsynced before append() returns, so a
+    change is durable as soon as the caller sees it. The snapshot CSVs
+    plus a replay of this file always give the current tables.
+
+    Offsets are byte positions. Compaction swaps in a new file, so
+    readers that track an offset should check rotated() first.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, 'ab')
+
+    def append(self, entry):
+        """Write one entry, fsync it and return the new end offset"""
+        self._file.write((json.dumps(entry) + "\n").encode('utf-8'))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def replay(self, start=0):
+        """Yield (entry, end_offset) pairs from a byte offset.
+
+        A torn final line (crash mid-append) is ignored.
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                yield json.loads(line), offset
+
+    def file_id(self):
+        """Inode of the file at path now (None if missing); changes on each compaction"""
+        try:
+            return os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+
+    def rotated(self):
+        """True if another process replaced the file we have open"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def reopen(self):
+        self._file.close()
+        self._open()
+
+    def discard_until(self, offset):
+        """Drop entries before offset, keeping anything appended after it"""
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        try:
+            os.replace(tmp_path, self.path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+        finally:
+            self._open()
@@ -0,0 +1,268 @@
+import numpy as np
+import pandas as pd
+
+BOOKING_COLUMNS = ['BookingID', 'AttendeeID', 'EventID', 'Status']
+STATUSES = ('Registered', 'Canceled')
+
+try:
+    import pyarrow  # noqa: F401
+    # Vectorized string ops when parsing BookingIDs
+    STRING_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:
+    STRING_DTYPE = str
+
+
+class Interner:
+    """Dense int codes for repeated strings; values[code] is the string back"""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.code(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        """Code for value, assigning the next one if it is new"""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def get(self, value):
+        return self.codes.get(value)
+
+    def encode(self, values):
+        """int32 codes for a column of values, assigning new ones as needed"""
+        values = pd.Series(values)
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(str).astype('category')
+        codes = values.cat.codes.to_numpy()
+        mapping = [self.code(str(value)) for value in values.cat.categories]
+        if (codes < 0).any():
+            # Missing values; code -1 picks this last entry
+            mapping.append(self.code('nan'))
+        return np.array(mapping, dtype=np.int32)[codes] if mapping else np.zeros(0, dtype=np.int32)
+
+    def categorical(self, codes):
+        return pd.Categorical.from_codes(codes, categories=pd.Index(self.values, dtype=object))
+
+
+class SortedIndex:
+    """Rows of a column grouped by value, in row order.
+
+    Rows present at the last rebuild are found by binary search over a
+    stable argsort; rows appended since are found by scanning the tail,
+    which is rebuilt into the sorted part once it grows past a fraction
+    of the table.
+    """
+
+    def __init__(self):
+        # (order, sorted values, rows covered), swapped as one so readers
+        # never mix two builds
+        self.state = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64), 0)
+
+    def rebuild(self, column):
+        order = np.argsort(column, kind='stable').astype(np.int32)
+        self.state = (order, column[order], len(column))
+
+    def rows(self, column, value):
+        order, values, indexed = self.state
+        # Same dtype as the column, or searchsorted converts the whole array
+        value = column.dtype.type(value)
+        rows = order[np.searchsorted(values, value, 'left'):np.searchsorted(values, value, 'right')]
+        tail = column[indexed:]
+        if len(tail):
+            extra = np.flatnonzero(tail == value) + indexed
+            if len(extra):
+                rows = np.concatenate([rows, extra.astype(np.int32)])
+        return rows
+
+    def stale(self, n):
+        indexed = self.state[2]
+        return n - indexed > max(1024, indexed // 8)
+
+
+class BookingTable:
+    """Bookings as parallel numpy columns instead of one dict per row.
+
+    AttendeeID and EventID are interned to int32 codes (the interners are
+    shared with the store, so codes line up with its attendee and event
+    tables), Status is an int8 code and BookingID is kept as its number
+    after prefix. IDs that don't have that exact form are kept aside as
+    strings. Rows are only ever appended; statuses change in place.
+    Registered counts per event code are maintained incrementally.
+    """
+
+    def __init__(self, attendees, events, prefix='B', width=3):
+        self.attendee_ids = attendees
+        self.event_ids = events
+        self.statuses = Interner(STATUSES)
+        self.prefix = prefix
+        self.width = width
+        self.n = 0
+        self.number = np.empty(0, dtype=np.int64)
+        self.attendee = np.empty(0, dtype=np.int32)
+        self.event = np.empty(0, dtype=np.int32)
+        self.status = np.empty(0, dtype=np.int8)
+        self.registered = np.zeros(len(events), dtype=np.int32)
+        self._odd_ids = {}
+        self._odd_rows = {}
+        self._by_number = SortedIndex()
+        self._by_attendee = SortedIndex()
+        self._by_event = SortedIndex()
+
+    # ----------------- Loading -----------------
+    def load(self, frame):
+        """Replace the contents with a bookings DataFrame (IDs may be categoricals)"""
+        ids = frame['BookingID'].astype(STRING_DTYPE)
+        digits = ids.str[len(self.prefix):]
+        valid = (ids.str.startswith(self.prefix) & digits.str.isdigit()).fillna(False)
+        # prefix + number zero-padded to width, as _number() accepts
+        length = digits.str.len()
+        canonical = (valid & ((length == self.width) | ((length > self.width) & ~digits.str.startswith('0'))))
+        canonical = canonical.fillna(False).to_numpy(dtype=bool)
+        self.number = pd.to_numeric(digits.where(valid), errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        self.number[~canonical] = -1
+        odd = np.flatnonzero(~canonical)
+        self._odd_ids = dict(zip(odd.tolist(), ids.iloc[odd].astype(str).tolist()))
+        self._odd_rows = {booking_id: row for row, booking_id in self._odd_ids.items()}
+        self.attendee = self.attendee_ids.encode(frame['AttendeeID'])
+        self.event = self.event_ids.encode(frame['EventID'])
+        self.status = self.statuses.encode(frame['Status']).astype(np.int8)
+        self.n = len(frame)
+        self.registered = np.bincount(self.event[self.status == self.statuses.code('Registered')],
+                                      minlength=len(self.event_ids)).astype(np.int32)
+        self._reindex()
+
+    def _reindex(self):
+        n = self.n
+        self._by_number.rebuild(self.number[:n])
+        self._by_attendee.rebuild(self.attendee[:n])
+        self._by_event.rebuild(self.event[:n])
+
+    # ----------------- Writes -----------------
+    def _grow(self):
+        capacity = max(1024, len(self.number) * 2)
+        for name in ('number', 'attendee', 'event', 'status'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def _count(self, event_code, delta):
+        if event_code >= len(self.registered):
+            self.registered = np.concatenate([
+                self.registered, np.zeros(max(event_code + 1, len(self.event_ids)) - len(self.registered),
+                                          dtype=np.int32)])
+        self.registered[event_code] += delta
+
+    def append(self, booking_id, attendee_id, event_id, status='Registered'):
+        """Add a booking and return its row"""
+        if self.n == len(self.number):
+            self._grow()
+        row = self.n
+        number = self._number(booking_id)
+        if number < 0:
+            self._odd_ids[row] = booking_id
+            self._odd_rows[booking_id] = row
+        self.number[row] = number
+        self.attendee[row] = self.attendee_ids.code(attendee_id)
+        self.event[row] = self.event_ids.code(event_id)
+        self.status[row] = self.statuses.code(status)
+        self.n = row + 1
+        if status == 'Registered':
+            self._count(int(self.event[row]), 1)
+        if self._by_number.stale(self.n):
+            self._reindex()
+        return row
+
+    def set_status(self, row, status):
+        registered = self.statuses.code('Registered')
+        old, new = int(self.status[row]), self.statuses.code(status)
+        event_code = int(self.event[row])
+        if old == registered:
+            self._count(event_code, -1)
+        if new == registered:
+            self._count(event_code, 1)
+        self.status[row] = new
+
+    # ----------------- Lookups -----------------
+    def _number(self, booking_id):
+        """BookingID as its number, or -1 if it isn't prefix + zero-padded digits"""
+        digits = str(booking_id)[len(self.prefix):]
+        if str(booking_id).startswith(self.prefix) and digits.isdigit():
+            number = int(digits)
+            if f"{self.prefix}{number:0{self.width}}" == booking_id:
+                return number
+        return -1
+
+    def row_of(self, booking_id):
+        """Row of a BookingID, or None"""
+        number = self._number(booking_id)
+        if number < 0:
+            return self._odd_rows.get(booking_id)
+        rows = self._by_number.rows(self.number[:self.n], number)
+        return int(rows[0]) if len(rows) else None
+
+    def _filter(self, rows, status):
+        if status is None:
+            return rows
+        code = self.statuses.get(status)
+        return rows[self.status[rows] == code] if code is not None else rows[:0]
+
+    def rows_for_attendee(self, attendee_id, status=None):
+        code = self.attendee_ids.get(attendee_id)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        return self._filter(self._by_attendee.rows(self.attendee[:self.n], code), status)
+
+    def rows_for_event(self, event_id, status=None):
+        code = self.event_ids.get(event_id)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        return self._filter(self._by_event.rows(self.event[:self.n], code), status)
+
+    def odd_ids(self):
+        """BookingIDs not stored as numbers"""
+        return list(self._odd_ids.values())
+
+    def max_number(self):
+        """Highest numeric BookingID, or 0"""
+        return int(self.number[:self.n].max()) if self.n else 0
+
+    def registered_count(self, event_id):
+        code = self.event_ids.get(event_id)
+        return int(self.registered[code]) if code is not None and code < len(self.registered) else 0
+
+    def booking_id(self, row):
+        odd = self._odd_ids.get(row)
+        return odd if odd is not None else f"{self.prefix}{int(self.number[row]):0{self.width}}"
+
+    def booking(self, row):
+        """Row as the {BookingID, AttendeeID, EventID, Status} dict callers expect"""
+        return {
+            'BookingID': self.booking_id(row),
+            'AttendeeID': self.attendee_ids.values[self.attendee[row]],
+            'EventID': self.event_ids.values[self.event[row]],
+            'Status': self.statuses.values[self.status[row]],
+        }
+
+    def bookings(self, rows):
+        return [self.booking(row) for row in rows.tolist()]
+
+    def frame(self):
+        """All bookings as a DataFrame; IDs and Status are categoricals"""
+        n = self.n
+        ids = self.prefix + pd.Series(self.number[:n]).astype(str).str.zfill(self.width)
+        for row, booking_id in self._odd_ids.items():
+            ids.iat[row] = booking_id
+        return pd.DataFrame({
+            'BookingID': ids,
+            'AttendeeID': self.attendee_ids.categorical(self.attendee[:n].copy()),
+            'EventID': self.event_ids.categorical(self.event[:n].copy()),
+            'Status': self.statuses.categorical(self.status[:n].copy()),
+        }, columns=BOOKING_COLUMNS)
@@ -0,0 +1,117 @@
+import argparse
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# On-disk types per table. IDs that repeat across rows and the booking
+# status are dictionary-encoded; dates are real dates.
+SCHEMAS = {
+    'Events': pa.schema([
+        ('EventID', pa.string()),
+        ('EventName', pa.string()),
+        ('Date', pa.date32()),
+        ('Time', pa.string()),
+        ('Venue', pa.dictionary(pa.int32(), pa.string())),
+        ('Capacity', pa.int32()),
+    ]),
+    'Attendee': pa.schema([
+        ('AttendeeID', pa.string()),
+        ('Name', pa.string()),
+        ('Email', pa.string()),
+    ]),
+    'Bookings': pa.schema([
+        ('BookingID', pa.string()),
+        ('AttendeeID', pa.dictionary(pa.int32(), pa.string())),
+        ('EventID', pa.dictionary(pa.int32(), pa.string())),
+        ('Status', pa.dictionary(pa.int8(), pa.string())),
+    ]),
+}
+EXTENSIONS = {'arrow': '.arrow', 'parquet': '.parquet', 'csv': '.csv'}
+
+
+def table_path(data_dir, name, fmt):
+    return os.path.join(data_dir, name + EXTENSIONS[fmt])
+
+
+# ----------------- Writing -----------------
+def to_arrow(df, name):
+    """Arrow table for a DataFrame of one of the three tables, cast to its schema"""
+    arrays = []
+    for field in SCHEMAS[name]:
+        values = pa.array(df[field.name].astype(str) if field.type == pa.string() or pa.types.is_dictionary(field.type)
+                          else df[field.name])
+        if pa.types.is_dictionary(field.type):
+            values = values.dictionary_encode().cast(field.type)
+        elif pa.types.is_date(field.type):
+            values = values.cast(pa.string()).cast(field.type)
+        else:
+            values = values.cast(field.type)
+        arrays.append(values)
+    return pa.Table.from_arrays(arrays, schema=SCHEMAS[name])
+
+
+def write_table(df, path, name):
+    """Atomically write df as an uncompressed Arrow IPC file or a Parquet file.
+
+    The file is replaced, never rewritten in place, so readers that still
+    have the old one memory-mapped keep a consistent copy.
+    """
+    table = to_arrow(df, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if path.endswith('.parquet'):
+        pq.write_table(table, tmp_path)
+    else:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# ----------------- Reading -----------------
+def read_table(path):
+    """Arrow table from an .arrow file (memory-mapped, zero copy) or a .parquet file"""
+    if path.endswith('.parquet'):
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def _dates_as_strings(table):
+    """Dates back to the YYYY-MM-DD strings the rest of the code compares"""
+    for i, field in enumerate(table.schema):
+        if pa.types.is_date(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table
+
+
+def to_frame(table):
+    """DataFrame over an Arrow table.
+
+    String columns stay Arrow-backed, so their bytes are the memory-mapped
+    pages themselves and are shared by every process reading the file.
+    Dictionary columns become Categoricals.
+    """
+    return _dates_as_strings(table).to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+def convert(data_dir, source='csv', target='arrow'):
+    """Rewrite Events/Attendee/Bookings of data_dir from one format to another"""
+    for name in SCHEMAS:
+        path = table_path(data_dir, name, source)
+        df = pd.read_csv(path) if source == 'csv' else to_frame(read_table(path))
+        if target == 'csv':
+            df.to_csv(table_path(data_dir, name, target), index=False)
+        else:
+            write_table(df, table_path(data_dir, name, target), name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the event tables between CSV, Arrow and Parquet")
+    parser.add_argument("data_dir")
+    parser.add_argument("--from", dest="source", choices=list(EXTENSIONS), default="csv")
+    parser.add_argument("--to", dest="target", choices=list(EXTENSIONS), default="arrow")
+    args = parser.parse_args()
+    convert(args.data_dir, args.source, args.target)
+    print(f"Wrote {args.target} tables to {args.data_dir}")
@@ -0,0 +1,41 @@
+import threading
+import telemetry
+
+
+class DataCache:
+    """Frames built from the store, shared by every caller in the process.
+
+    Each frame is kept with the store version it was built at and rebuilt
+    on the first request after the version moves. The version bumps on
+    every journaled write, on reloads triggered by file changes and, for
+    the SQLite store, on writes from any process. One caller rebuilds
+    while the others wait and then reuse its result. Returned frames are
+    shared, so callers must not modify them.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._frames = {}
+
+    def get(self, name, build):
+        """Frame called name, from build() unless cached at the current version"""
+        version = self.store.version
+        entry = self._frames.get(name)
+        if entry is None or entry[0] != version:
+            with self._lock:
+                entry = self._frames.get(name)
+                if entry is None or entry[0] != version:
+                    telemetry.metrics.inc('data_cache_requests_total', frame=name, result='miss')
+                    with telemetry.span("data_cache.build", frame=name):
+                        entry = self._frames[name] = (version, build())
+                    return entry[1]
+        telemetry.metrics.inc('data_cache_requests_total', frame=name, result='hit')
+        return entry[1]
+
+    def events(self):
+        # The catalog snapshot's frame is immutable already; no copy needed
+        return self.store.events
+
+    def attendees(self):
+        return self.get('attendees', self.store.attendees_frame)
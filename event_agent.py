@@ -1,36 +1,199 @@
+import numpy as np
 import pandas as pd
+import asyncio
+import contextvars
 import json
 import os
 import re
-from google import genai
+from contextlib import contextmanager
 from difflib import get_close_matches
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Any
+from event_store import EventStore
+from sqlite_store import SQLiteEventStore
+from snapshot_watcher import SnapshotWatcher
+from intent_router import route_intent, strip_user_info
+from llm_cache import ResponseCache
+from llm_client import LLMClient, LLMUnavailable
+from llm_backends import make_backend
+from event_context import EventContext
+from retrieval import EventRetriever
+from event_search import EventSearchIndex
+from event_ranking import EventRanking
+import telemetry
+from telemetry import log, traced
+from llm_schemas import (
+    IntentChoice, Recommendations, Suggestions, Forecast, Clusters, parse_structured, partial_string_field
+)
 
 # ----------------- GenAI Setup -----------------
+# LLM_BACKEND picks where model calls go: gemini (default), stub (rule-
+# based answers), record (gemini, saving replies to LLM_RECORDINGS) or
+# replay (recorded replies). LLM_SYNTHETIC_LATENCY gives stub and replay
+# a fixed delay in seconds; replay otherwise uses the recorded latency.
 api_key = "your-api-key"
-client = genai.Client(api_key=api_key)
+MODEL = "gemini-2.5-flash"
+synthetic_latency = os.environ.get("LLM_SYNTHETIC_LATENCY")
+backend = make_backend(
+    os.environ.get("LLM_BACKEND", "gemini").lower(),
+    api_key=api_key,
+    recordings=os.environ.get("LLM_RECORDINGS", "llm_recordings.jsonl"),
+    latency=float(synthetic_latency) if synthetic_latency else None,
+)
 
-# ----------------- Load CSVs -----------------
-csv_path = "csv_files/"
-events = pd.read_csv(os.path.join(csv_path, 'Events.csv'))
-attendees = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
-bookings = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
+# Every model call is bounded: LLM_TIMEOUT per call, LLM_REQUEST_BUDGET
+# for everything one user action triggers. Latency-critical calls send a
+# hedged duplicate once the first is slower than recent p95 (or
+# LLM_HEDGE_AFTER seconds until there is enough history); hedged calls
+# share a pool of LLM_MAX_WORKERS threads.
+llm = LLMClient(
+    backend,
+    MODEL,
+    timeout=float(os.environ.get("LLM_TIMEOUT", "20")),
+    retries=int(os.environ.get("LLM_RETRIES", "2")),
+    hedge_after=float(os.environ.get("LLM_HEDGE_AFTER", "3")),
+    max_workers=int(os.environ.get("LLM_MAX_WORKERS", "32")),
+)
+REQUEST_BUDGET = float(os.environ.get("LLM_REQUEST_BUDGET", "12"))
+
+# ----------------- Telemetry -----------------
+# Spans and metrics are always recorded in memory (see telemetry.py).
+# TELEMETRY_METRICS_PORT serves them over HTTP (/metrics in Prometheus
+# text, /spans as JSON lines); TELEMETRY_SPANS_FILE appends every span to
+# a file; EVENT_PROFILE=cprofile|pyinstrument profiles each request.
+metrics_port = os.environ.get("TELEMETRY_METRICS_PORT")
+if metrics_port:
+    telemetry.serve_metrics(int(metrics_port))
+
+def fell_back(what, error):
+    """Note that a model-backed helper answered locally instead"""
+    log.warning("%s failed, using local fallback: %s", what, error)
+    telemetry.metrics.inc('ai_fallbacks_total', helper=what)
+
+@contextmanager
+def request_span(entry):
+    """Span (and opt-in profile) around one agent request.
+
+    Handlers set path on the span (routed, classified, invalid,
+    unavailable or error); agent_requests_total counts requests by it.
+    """
+    with telemetry.profiled(entry), telemetry.span("agent.request", entry=entry) as span:
+        try:
+            yield span
+        finally:
+            telemetry.metrics.inc('agent_requests_total', entry=entry, path=span.attrs.get('path', 'error'),
+                                  intent=span.attrs.get('intent') or "none")
+
+# ----------------- Load Data -----------------
+# EVENT_STORE_BACKEND=sqlite keeps the tables in csv_files/events.db
+# (imported from the CSVs on first run); the default is the CSV store.
+# EVENT_DATA_DIR points at another folder of CSVs, e.g. generated ones.
+# EVENT_SNAPSHOT_FORMAT=arrow keeps the CSV store's snapshots as
+# memory-mapped Arrow files instead, converting the CSVs on first load.
+# Edits to the CSV store's files are picked up by a file watcher and
+# swapped in as a new snapshot; EVENT_WATCH_FILES=0 turns it off.
+csv_path = os.environ.get("EVENT_DATA_DIR", "csv_files/")
+store_backend = os.environ.get("EVENT_STORE_BACKEND", "csv").lower()
+if store_backend == "sqlite":
+    store = SQLiteEventStore(os.path.join(csv_path, 'events.db'), csv_path)
+else:
+    store = EventStore(csv_path, snapshot_format=os.environ.get("EVENT_SNAPSHOT_FORMAT", "csv").lower())
+    store.start_compaction()
+    if os.environ.get("EVENT_WATCH_FILES", "1") != "0":
+        snapshot_watcher = SnapshotWatcher(store)
+        snapshot_watcher.start()
+event_context = EventContext(store)
+retriever = EventRetriever(store)
+event_search = EventSearchIndex(store)
+event_ranking = EventRanking(store)
+# Top search hits suggest_event() compares names against
+SUGGESTION_CANDIDATES = 25
+
+# Most events any single prompt may list; larger catalogs are narrowed
+# to the top matches for the query first.
+MAX_PROMPT_EVENTS = int(os.environ.get("MAX_PROMPT_EVENTS", "25"))
+
+# ----------------- Response Cache -----------------
+# Keyed on model, normalized prompt and store.version, so answers are
+# reused across clicks and sessions until events or bookings change.
+# Set LLM_CACHE_DIR to also keep them on disk.
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("LLM_CACHE_SIZE", "256")),
+    ttl=int(os.environ.get("LLM_CACHE_TTL", "900")),
+    disk_dir=os.environ.get("LLM_CACHE_DIR")
+)
+
+def cache_key(prompt, schema):
+    model = MODEL if schema is None else f"{MODEL}/{schema.__name__}"
+    return response_cache.make_key(model, prompt, store.version)
+
+def generate_text(prompt, schema=None, hedge=False):
+    """Model response text for a prompt, served from the cache when possible.
+
+    With a schema (a llm_schemas model) the model is constrained to
+    JSON of that shape. Raises LLMUnavailable when the deadline passes.
+    """
+    key = cache_key(prompt, schema)
+    text = response_cache.get(key)
+    if text is None:
+        text = llm.generate(prompt, schema, hedge=hedge).strip()
+        response_cache.set(key, text)
+    return text
+
+def generate_text_stream(prompt, schema=None):
+    """Yield the response for a prompt as it arrives; cached once complete"""
+    key = cache_key(prompt, schema)
+    text = response_cache.get(key)
+    if text is not None:
+        yield text
+        return
+    parts = []
+    for chunk in llm.stream(prompt, schema):
+        parts.append(chunk)
+        yield chunk
+    response_cache.set(key, "".join(parts).strip())
+
+async def generate_text_async(prompt, schema=None, hedge=False):
+    """generate_text without blocking the event loop, so independent calls can overlap"""
+    key = cache_key(prompt, schema)
+    text = response_cache.get(key)
+    if text is None:
+        text = (await llm.generate_async(prompt, schema, hedge=hedge)).strip()
+        response_cache.set(key, text)
+    return text
+
+def generate_json(prompt, schema):
+    """Structured model reply as a dict, or None if it doesn't fit schema"""
+    try:
+        return parse_structured(generate_text(prompt, schema), schema)
+    except Exception as e:
+        fell_back(schema.__name__, e)
+        return None
+
+async def generate_json_async(prompt, schema):
+    try:
+        return parse_structured(await generate_text_async(prompt, schema), schema)
+    except Exception as e:
+        fell_back(schema.__name__, e)
+        return None
 
 # ----------------- Helper Functions -----------------
 def find_event(event_name):
     """Case-insensitive event lookup"""
     if not event_name:
         return pd.DataFrame()
-    mask = events['EventName'].str.strip().str.lower() == event_name.strip().lower()
-    return events[mask]
+    return store.find_event(event_name)
 
 def suggest_event(event_name):
     """Suggest closest matching event names"""
     if not event_name:
         return []
-    all_names = events['EventName'].tolist()
-    matches = get_close_matches(event_name, all_names, n=3, cutoff=0.5)
-    return matches
+    # Candidates from the search index (typo tolerant), closest names among them
+    catalog = store.catalog
+    positions, _ = event_search.search(event_name, catalog, limit=SUGGESTION_CANDIDATES)
+    names = [catalog.rows[pos]['EventName'] for pos in positions.tolist()]
+    return get_close_matches(event_name, names, n=3, cutoff=0.5)
 
 def extract_user_info(prompt):
     """Extract name and email from prompt"""
@@ -42,38 +205,105 @@ def extract_user_info(prompt):
     
     return name, email
 
+def suggestion_window(target_date=None):
+    """(target_date, date_from, date_to) for a week either side of a date"""
+    if not target_date:
+        target_date = datetime.now().strftime('%Y-%m-%d')
+    try:
+        target = datetime.strptime(str(target_date), '%Y-%m-%d')
+    except ValueError:
+        return target_date, None, None
+    return (target_date, (target - timedelta(days=7)).strftime('%Y-%m-%d'),
+            (target + timedelta(days=7)).strftime('%Y-%m-%d'))
+
+# ----------------- Local Fallbacks -----------------
+# Deterministic stand-ins used when the model can't answer within the
+# request budget. Each returns the same shape as the AI function.
+def local_recommendations(user_email, preferences=None, k=2):
+    """Open events most similar to the user's bookings"""
+    attendee = store.attendee_by_email(user_email)
+    if attendee is None:
+        return None
+    booked = store.events_for_attendee(attendee['AttendeeID'], status=None)
+    booked_ids = {event['EventID'] for event in booked}
+    query = " ".join([event['EventName'] for event in booked] + [preferences or ""])
+    picks = [event for event in retriever.top_k(query, k + len(booked_ids), available_only=True)
+             if event['EventID'] not in booked_ids][:k]
+    return {'recommendations': [
+        {'event_name': event['EventName'],
+         'reason': f"{event['Date']} at {event['Venue']}, {store.seats_left(event['EventID'])} seats left."}
+        for event in picks
+    ]}
+
+def local_suggestions(target_date=None):
+    """Events within a week of the date, soonest first"""
+    target_date, date_from, date_to = suggestion_window(target_date)
+    return {'suggestions': [
+        {'event_name': event['EventName'], 'date': str(event['Date']),
+         'reason': f"{event['Time']} at {event['Venue']}, within a week of {target_date}."}
+        for event in retriever.top_k("", 5, date_from=date_from, date_to=date_to)
+    ]}
+
+def local_forecast(event_name):
+    """Current fill rate as the forecast, with a threshold-based action"""
+    event = find_event(event_name)
+    if event.empty:
+        return None
+    capacity = int(event['Capacity'].values[0])
+    current_bookings = store.registered_count(event['EventID'].values[0])
+    pct = round(current_bookings / capacity * 100) if capacity > 0 else 0
+    if pct < 30:
+        recommendation = "Promote the event to boost registrations."
+    elif pct > 90:
+        recommendation = "Open a waitlist; the event is nearly full."
+    else:
+        recommendation = "Bookings are on track."
+    return {
+        'predicted_attendance_pct': pct,
+        'confidence': 'low',
+        'insights': f"{current_bookings}/{capacity} booked so far; assumes no further change.",
+        'recommendation': recommendation
+    }
+
+def local_clusters():
+    """Events grouped by venue"""
+    clusters = {}
+    for event in store.event_rows():
+        clusters.setdefault(f"{event['Venue']}", []).append(event['EventName'])
+    return {'clusters': clusters}
+
+def local_comparison(event1, event2):
+    """Side-by-side facts for two events"""
+    lines = []
+    for name in (event1, event2):
+        event = store.event_by_name(name)
+        if event is None:
+            return "One or both events not found."
+        lines.append(f"• {event['EventName']}: {event['Date']} at {event['Time']}, {event['Venue']}, "
+                     f"{store.seats_left(event['EventID'])}/{event['Capacity']} seats left")
+    return "\n".join(lines)
+
 # ----------------- Advanced AI Functions -----------------
-def smart_event_recommendation(user_email, preferences=None):
-    """AI recommends events based on user history and preferences"""
-    attendees_df = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
-    bookings_df = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
-    
-    attendee = attendees_df[attendees_df['Email'] == user_email]
-    if attendee.empty:
+def _recommendation_prompt(user_email, preferences=None):
+    """Prompt for smart_event_recommendation, or None for an unknown user"""
+    attendee = store.attendee_by_email(user_email)
+    if attendee is None:
         return None
     
-    attendee_id = attendee['AttendeeID'].values[0]
-    user_bookings = bookings_df[bookings_df['AttendeeID'] == attendee_id]
-    
     # Get user's past events
-    past_events = []
-    for _, booking in user_bookings.iterrows():
-        event = events[events['EventID'] == booking['EventID']]
-        if not event.empty:
-            past_events.append(event['EventName'].values[0])
+    past_events = [event['EventName'] for event in store.events_for_attendee(attendee['AttendeeID'], status=None)]
     
-    # Get available events
+    # Get available events most similar to the user's history and preferences
+    query = " ".join(past_events + [preferences or ""])
     available_events = []
-    for _, event in events.iterrows():
-        seats = seats_left(event['EventName'])
-        if seats > 0:
-            available_events.append({
-                'name': str(event['EventName']),
-                'date': str(event['Date']),
-                'venue': str(event['Venue']),
-                'capacity': int(event['Capacity']),
-                'seats_left': int(seats)
-            })
+    for event in retriever.top_k(query, MAX_PROMPT_EVENTS, available_only=True):
+        available_events.append({
+            'name': str(event['EventName']),
+            'date': str(event['Date']),
+            'venue': str(event['Venue']),
+            'capacity': int(event['Capacity']),
+            'seats_left': int(store.seats_left(event['EventID']))
+        })
     
     # AI recommendation
     prompt = f"""Based on user's past bookings: {', '.join(past_events) if past_events else 'None'}
@@ -87,20 +317,19 @@ Return JSON:
     {{"event_name": "...", "reason": "..."}}
   ]
 }}"""
+    return prompt
 
-    try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-        text = response.text.strip()
-        text = re.sub(r"^```json\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"^```\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"\s*```$", "", text, flags=re.IGNORECASE)
-        
-        return json.loads(text)
-    except:
+@traced("ai.recommendation")
+def smart_event_recommendation(user_email, preferences=None):
+    """AI recommends events based on user history and preferences"""
+    prompt = _recommendation_prompt(user_email, preferences)
+    if prompt is None:
         return None
+    result = generate_json(prompt, Recommendations)
+    # An empty list is no answer either
+    if result and result.get('recommendations'):
+        return result
+    return local_recommendations(user_email, preferences)
 
 def auto_priority_booking(email, priority_threshold=0.7):
     """AI automatically books high-priority events for user based on preferences"""
@@ -123,18 +352,11 @@ def auto_priority_booking(email, priority_threshold=0.7):
 
 def intelligent_overbooking_prevention(email):
     """AI prevents users from booking too many events in a short period"""
-    attendees_df = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
-    bookings_df = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
-    
-    attendee = attendees_df[attendees_df['Email'] == email]
-    if attendee.empty:
+    attendee = store.attendee_by_email(email)
+    if attendee is None:
         return {"status": "ok"}
     
-    attendee_id = attendee['AttendeeID'].values[0]
-    active_bookings = bookings_df[
-        (bookings_df['AttendeeID'] == attendee_id) & 
-        (bookings_df['Status'] == 'Registered')
-    ]
+    active_bookings = store.bookings_for_attendee(attendee['AttendeeID'], 'Registered')
     
     if len(active_bookings) >= 3:
         return {
@@ -148,33 +370,31 @@ def intelligent_overbooking_prevention(email):
 def auto_seat_allocation_optimizer():
     """AI optimizes seat allocation across all events"""
     optimization_report = []
-    
-    for _, event in events.iterrows():
-        event_name = str(event['EventName'])
-        capacity = int(event['Capacity'])
-        booked = len(bookings[
-            (bookings['EventID'] == event['EventID']) & 
-            (bookings['Status'] == 'Registered')
-        ])
-        utilization = (booked / capacity * 100) if capacity > 0 else 0
-        
-        if utilization < 30:
+    catalog, registered = store.seat_counts()
+    capacity = catalog.capacity
+    utilization = np.zeros(len(capacity))
+    np.divide(registered * 100.0, capacity, out=utilization, where=capacity > 0)
+    rows = catalog.rows
+    
+    for pos in np.flatnonzero((utilization < 30) | (utilization > 90)).tolist():
+        if utilization[pos] < 30:
             optimization_report.append({
-                'event': event_name,
+                'event': str(rows[pos]['EventName']),
                 'status': 'under-utilized',
-                'utilization': f"{utilization:.1f}%",
+                'utilization': f"{utilization[pos]:.1f}%",
                 'ai_action': 'AI will send promotional emails to boost registrations'
             })
-        elif utilization > 90:
+        else:
             optimization_report.append({
-                'event': event_name,
+                'event': str(rows[pos]['EventName']),
                 'status': 'near-capacity',
-                'utilization': f"{utilization:.1f}%",
+                'utilization': f"{utilization[pos]:.1f}%",
                 'ai_action': 'AI activated waitlist and overflow planning'
             })
     
     return optimization_report
 
+@traced("ai.forecast")
 def predictive_attendance_forecast(event_name):
     """AI predicts final attendance based on current booking trends"""
     event = find_event(event_name)
@@ -183,10 +403,7 @@ def predictive_attendance_forecast(event_name):
     
     event_id = event['EventID'].values[0]
     capacity = int(event['Capacity'].values[0])
-    current_bookings = len(bookings[
-        (bookings['EventID'] == event_id) & 
-        (bookings['Status'] == 'Registered')
-    ])
+    current_bookings = store.registered_count(event_id)
     
     # Simple AI prediction (can be enhanced with ML)
     booking_rate = current_bookings / capacity
@@ -203,49 +420,34 @@ Return JSON:
   "insights": "brief analysis",
   "recommendation": "action to take"
 }}"""
-    
-    try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-        text = response.text.strip()
-        text = re.sub(r"^```json\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"^```\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"\s*```$", "", text, flags=re.IGNORECASE)
-        
-        return json.loads(text)
-    except:
-        return None
+    return generate_json(prompt, Forecast) or local_forecast(event_name)
 
+@traced("ai.clustering")
 def auto_event_clustering():
     """AI automatically groups similar events for better discovery"""
     prompt = f"""Analyze these events and group them into categories (Tech, Business, Arts, etc.):
-{events[['EventName', 'Venue']].to_dict('records')}
+{store.events[['EventName', 'Venue']].to_dict('records')}
 
 Return JSON:
 {{
-  "clusters": {{
-    "Tech": ["event1", "event2"],
-    "Business": ["event3"],
-    ...
-  }}
+  "clusters": [
+    {{"category": "Tech", "events": ["event1", "event2"]}},
+    {{"category": "Business", "events": ["event3"]}}
+  ]
 }}"""
-    
-    try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-        text = response.text.strip()
-        text = re.sub(r"^```json\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"^```\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"\s*```$", "", text, flags=re.IGNORECASE)
-        
-        return json.loads(text)
-    except:
-        return None
+    result = generate_json(prompt, Clusters)
+    if result is None:
+        return local_clusters()
+    return {'clusters': {c['category']: c['events'] for c in result['clusters']}}
+
+def _cancellation_prompt(event_name, event_date, alternatives):
+    return f"""User wants to cancel: {event_name} on {event_date}
+Alternative events available: {alternatives if alternatives else 'None'}
 
+Should they cancel? Provide reasoning and suggest alternatives if any.
+Keep response under 80 words."""
+
+@traced("ai.cancellation")
 def smart_cancellation_assistant(email, event_name):
     """AI helps users make informed cancellation decisions"""
     # Check if there are better alternatives
@@ -256,51 +458,32 @@ def smart_cancellation_assistant(email, event_name):
         return None
     
     event_date = str(event['Date'].values[0])
-    
-    prompt = f"""User wants to cancel: {event_name} on {event_date}
-Alternative events available: {recommendations if recommendations else 'None'}
-
-Should they cancel? Provide reasoning and suggest alternatives if any.
-Keep response under 80 words."""
+    prompt = _cancellation_prompt(event_name, event_date, recommendations)
     
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-        return response.text.strip()
-    except:
+        return generate_text(prompt)
+    except Exception as e:
+        fell_back("cancellation advice", e)
         return "Proceed with cancellation if needed."
 
 def auto_notification_scheduler(email):
     """AI automatically schedules notifications for upcoming events"""
-    attendees_df = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
-    bookings_df = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
-    
-    attendee = attendees_df[attendees_df['Email'] == email]
-    if attendee.empty:
+    attendee = store.attendee_by_email(email)
+    if attendee is None:
         return None
     
-    attendee_id = attendee['AttendeeID'].values[0]
-    user_bookings = bookings_df[
-        (bookings_df['AttendeeID'] == attendee_id) & 
-        (bookings_df['Status'] == 'Registered')
-    ]
-    
     notifications = []
-    for _, booking in user_bookings.iterrows():
-        event = events[events['EventID'] == booking['EventID']]
-        if not event.empty:
-            notifications.append({
-                'event': str(event['EventName'].values[0]),
-                'date': str(event['Date'].values[0]),
-                'reminders': [
-                    '24 hours before',
-                    '3 hours before',
-                    '30 minutes before'
-                ],
-                'ai_note': 'Auto-scheduled by AI'
-            })
+    for event in store.events_for_attendee(attendee['AttendeeID']):
+        notifications.append({
+            'event': str(event['EventName']),
+            'date': str(event['Date']),
+            'reminders': [
+                '24 hours before',
+                '3 hours before',
+                '30 minutes before'
+            ],
+            'ai_note': 'Auto-scheduled by AI'
+        })
     
     return notifications
 
@@ -321,36 +504,26 @@ def auto_waitlist_management(event_name):
 
 def smart_schedule_conflict_detection(email, event_name):
     """Detect scheduling conflicts with existing bookings"""
-    attendees_df = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
-    bookings_df = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
-    
-    attendee = attendees_df[attendees_df['Email'] == email]
-    if attendee.empty:
+    attendee = store.attendee_by_email(email)
+    if attendee is None:
         return None
     
-    new_event = find_event(event_name)
-    if new_event.empty:
+    catalog = store.catalog
+    new_event = catalog.event_by_name(event_name) if event_name else None
+    if new_event is None:
         return None
     
-    new_date = new_event['Date'].values[0]
-    new_time = new_event['Time'].values[0]
+    new_date = catalog.dates[catalog.positions[new_event['EventID']]]
     
     # Check user's existing bookings
-    attendee_id = attendee['AttendeeID'].values[0]
-    user_bookings = bookings_df[
-        (bookings_df['AttendeeID'] == attendee_id) & 
-        (bookings_df['Status'] == 'Registered')
-    ]
-    
     conflicts = []
-    for _, booking in user_bookings.iterrows():
-        event = events[events['EventID'] == booking['EventID']]
-        if not event.empty:
-            if event['Date'].values[0] == new_date:
-                conflicts.append({
-                    'event': event['EventName'].values[0],
-                    'time': event['Time'].values[0]
-                })
+    for event in store.events_for_attendee(attendee['AttendeeID']):
+        pos = catalog.positions.get(event['EventID'])
+        if pos is not None and catalog.dates[pos] == new_date:
+            conflicts.append({
+                'event': event['EventName'],
+                'time': event['Time']
+            })
     
     if conflicts:
         return {
@@ -360,14 +533,13 @@ def smart_schedule_conflict_detection(email, event_name):
         }
     return {"has_conflict": False}
 
-def auto_event_suggestions_by_date(target_date=None):
-    """AI suggests events happening around a specific date"""
-    if not target_date:
-        target_date = datetime.now().strftime('%Y-%m-%d')
+def _suggestions_prompt(target_date=None):
+    # Only events within a week of the target date go into the prompt
+    target_date, date_from, date_to = suggestion_window(target_date)
     
     # Convert events to JSON-safe format
     events_data = []
-    for _, event in events.iterrows():
+    for event in retriever.top_k("", MAX_PROMPT_EVENTS, date_from=date_from, date_to=date_to):
         events_data.append({
             'EventName': str(event['EventName']),
             'Date': str(event['Date']),
@@ -385,28 +557,24 @@ Return JSON:
     {{"event_name": "...", "date": "...", "reason": "..."}}
   ]
 }}"""
+    return prompt
 
-    try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-        text = response.text.strip()
-        text = re.sub(r"^```json\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"^```\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"\s*```$", "", text, flags=re.IGNORECASE)
-        
-        return json.loads(text)
-    except:
-        return None
+@traced("ai.suggestions")
+def auto_event_suggestions_by_date(target_date=None):
+    """AI suggests events happening around a specific date"""
+    result = generate_json(_suggestions_prompt(target_date), Suggestions)
+    # An empty list is no answer either
+    if result and result.get('suggestions'):
+        return result
+    return local_suggestions(target_date)
 
-def intelligent_event_comparison(event1, event2):
-    """AI compares two events and provides detailed analysis"""
+def _comparison_prompt(event1, event2):
+    """Prompt for intelligent_event_comparison, or None if an event is unknown"""
     e1 = find_event(event1)
     e2 = find_event(event2)
     
     if e1.empty or e2.empty:
-        return "One or both events not found."
+        return None
     
     # Get seats left and ensure it's Python int
     seats1 = seats_left(event1)
@@ -443,40 +611,33 @@ Event 2: {json.dumps(e2_data)}
 
 Provide comparison on: availability, timing, venue convenience, and which might be better based on different user preferences.
 Keep response under 100 words."""
+    return prompt
 
+@traced("ai.comparison")
+def intelligent_event_comparison(event1, event2):
+    """AI compares two events and provides detailed analysis"""
+    prompt = _comparison_prompt(event1, event2)
+    if prompt is None:
+        return "One or both events not found."
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-        return response.text.strip()
-    except:
-        return "Unable to compare events at this time."
+        return generate_text(prompt)
+    except Exception as e:
+        fell_back("comparison", e)
+        return local_comparison(event1, event2)
 
 def auto_reminder_suggestions(email):
     """AI suggests which events user should be reminded about"""
-    attendees_df = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
-    bookings_df = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
-    
-    attendee = attendees_df[attendees_df['Email'] == email]
-    if attendee.empty:
+    attendee = store.attendee_by_email(email)
+    if attendee is None:
         return None
     
-    attendee_id = attendee['AttendeeID'].values[0]
-    user_bookings = bookings_df[
-        (bookings_df['AttendeeID'] == attendee_id) & 
-        (bookings_df['Status'] == 'Registered')
-    ]
-    
     upcoming = []
-    for _, booking in user_bookings.iterrows():
-        event = events[events['EventID'] == booking['EventID']]
-        if not event.empty:
-            upcoming.append({
-                'event': event['EventName'].values[0],
-                'date': event['Date'].values[0],
-                'time': event['Time'].values[0]
-            })
+    for event in store.events_for_attendee(attendee['AttendeeID']):
+        upcoming.append({
+            'event': event['EventName'],
+            'date': event['Date'],
+            'time': event['Time']
+        })
     
     if upcoming:
         return {
@@ -487,8 +648,10 @@ def auto_reminder_suggestions(email):
 
 # ----------------- Core Event Functions -----------------
 def show_events_by_date(date=None):
+    catalog = store.catalog
+    events = catalog.events
     if date:
-        ev = events[events['Date'] == date]
+        ev = events.iloc[catalog.positions_on(date)]
         if ev.empty:
             return "No events on this date."
         return ev[['EventName', 'Date', 'Time', 'Venue', 'Capacity']].to_dict(orient='records')
@@ -496,17 +659,14 @@ def show_events_by_date(date=None):
         return events[['EventName', 'Date', 'Time', 'Venue', 'Capacity']].to_dict(orient='records')
 
 def seats_left(event_name):
-    event = find_event(event_name)
-    if event.empty:
+    event = store.event_by_name(event_name) if event_name else None
+    if event is None:
         suggestions = suggest_event(event_name)
         if suggestions:
             return f"Event not found. Did you mean: {', '.join(suggestions)}?"
         return "Event not found."
     
-    event_id = event['EventID'].values[0]
-    booked = len(bookings[(bookings['EventID'] == event_id) & (bookings['Status'] == 'Registered')])
-    capacity = int(event['Capacity'].values[0])  # Convert to Python int
-    return int(capacity - booked)  # Return Python int, not numpy int64
+    return store.seats_left(event['EventID'])
 
 def register_attendee(name, email, event_name):
     if not name or not email or not event_name:
@@ -533,39 +693,20 @@ def register_attendee(name, email, event_name):
     if waitlist:
         return waitlist['message']
     
-    # Reload attendees to get latest data
-    attendees_df = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
+    attendee = store.attendee_by_email(email)
+    if attendee is None:
+        attendee = store.add_attendee(name, email)
     
-    if email not in attendees_df['Email'].values:
-        new_id = f"A{len(attendees_df)+1:03}"
-        new_attendee = pd.DataFrame([[new_id, name, email]], columns=['AttendeeID', 'Name', 'Email'])
-        attendees_df = pd.concat([attendees_df, new_attendee], ignore_index=True)
-        attendees_df.to_csv(os.path.join(csv_path, 'Attendee.csv'), index=False)
-    
-    attendee_id = attendees_df[attendees_df['Email'] == email]['AttendeeID'].values[0]
+    attendee_id = attendee['AttendeeID']
     event_id = event['EventID'].values[0]
     
-    # Reload bookings
-    bookings_df = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
-    
-    # Check for existing booking
-    existing_booking = bookings_df[
-        (bookings_df['AttendeeID'] == attendee_id) & 
-        (bookings_df['EventID'] == event_id) & 
-        (bookings_df['Status'] == 'Registered')
-    ]
-    if not existing_booking.empty:
+    # Duplicate check, seat check and insert happen atomically in the store
+    status, _ = store.reserve_seat(attendee_id, event_id)
+    if status == 'duplicate':
         return f"You are already registered for {event['EventName'].values[0]}!"
-    
-    if seats_left(event_name) <= 0:
+    if status == 'full':
         return f"Sorry, no seats available for {event['EventName'].values[0]}."
     
-    new_booking_id = f"B{len(bookings_df)+1:03}"
-    new_booking = pd.DataFrame([[new_booking_id, attendee_id, event_id, 'Registered']], 
-                               columns=['BookingID', 'AttendeeID', 'EventID', 'Status'])
-    bookings_df = pd.concat([bookings_df, new_booking], ignore_index=True)
-    bookings_df.to_csv(os.path.join(csv_path, 'Bookings.csv'), index=False)
-    
     # Auto reminder setup
     reminder = auto_reminder_suggestions(email)
     reminder_msg = f"\n\n🔔 {reminder['ai_note']}" if reminder else ""
@@ -576,15 +717,11 @@ def cancel_booking(email, event_name):
     if not email or not event_name:
         return "Missing required information. Please provide your email and event name."
     
-    # Reload data
-    attendees_df = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
-    bookings_df = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
-    
-    attendee = attendees_df[attendees_df['Email'] == email]
-    if attendee.empty:
+    attendee = store.attendee_by_email(email)
+    if attendee is None:
         return "Attendee not found."
     
-    attendee_id = attendee['AttendeeID'].values[0]
+    attendee_id = attendee['AttendeeID']
     event = find_event(event_name)
     
     if event.empty:
@@ -594,16 +731,12 @@ def cancel_booking(email, event_name):
         return "Event not found."
     
     event_id = event['EventID'].values[0]
-    booking = bookings_df[
-        (bookings_df['AttendeeID'] == attendee_id) & 
-        (bookings_df['EventID'] == event_id)
-    ]
+    booking = store.find_booking(attendee_id, event_id, 'Registered')
     
-    if booking.empty or booking['Status'].values[0] != 'Registered':
+    if booking is None:
         return "No active booking found for this event."
     
-    bookings_df.loc[booking.index, 'Status'] = 'Canceled'
-    bookings_df.to_csv(os.path.join(csv_path, 'Bookings.csv'), index=False)
+    store.set_booking_status(booking, 'Canceled')
     
     return f"✅ Booking for {event['EventName'].values[0]} canceled successfully.\n\n💡 AI Tip: A seat just opened up - we'll notify waitlisted users automatically!"
 
@@ -612,54 +745,159 @@ def get_user_bookings(email):
     if not email:
         return "Email not provided."
     
-    # Reload data
-    attendees_df = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
-    bookings_df = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
-    
-    attendee = attendees_df[attendees_df['Email'] == email]
-    if attendee.empty:
+    attendee = store.attendee_by_email(email)
+    if attendee is None:
         return "No bookings found for this email."
     
-    attendee_id = attendee['AttendeeID'].values[0]
-    user_bookings = bookings_df[
-        (bookings_df['AttendeeID'] == attendee_id) & 
-        (bookings_df['Status'] == 'Registered')
-    ]
-    
-    if user_bookings.empty:
+    user_events = store.events_for_attendee(attendee['AttendeeID'])
+    if not user_events:
         return "You have no active bookings."
     
     result = []
-    for _, booking in user_bookings.iterrows():
-        event = events[events['EventID'] == booking['EventID']]
-        if not event.empty:
-            result.append({
-                'EventName': event['EventName'].values[0],
-                'Date': event['Date'].values[0],
-                'Time': event['Time'].values[0],
-                'Venue': event['Venue'].values[0]
-            })
+    for event in user_events:
+        result.append({
+            'EventName': event['EventName'],
+            'Date': event['Date'],
+            'Time': event['Time'],
+            'Venue': event['Venue']
+        })
     
     return result
 
-def get_event_context():
-    """Build context string with all event data"""
-    context = "Available Events:\n"
-    for _, row in events.iterrows():
-        left = seats_left(row['EventName'])
-        context += f"- {row['EventName']}: {row['Date']} at {row['Time']}, Venue: {row['Venue']}, Capacity: {row['Capacity']}, Seats Left: {left}\n"
-    return context
+def get_event_context(query=None):
+    """Context string with event data (memoized, see EventContext).
+
+    Catalogs larger than MAX_PROMPT_EVENTS are cut down to the events
+    most relevant to query.
+    """
+    total = len(store.event_rows())
+    if total <= MAX_PROMPT_EVENTS:
+        return event_context.render()
+    shortlist = retriever.top_k(strip_user_info(query or ""), MAX_PROMPT_EVENTS)
+    lines = event_context.lines_for(event['EventID'] for event in shortlist)
+    return (f"Available Events (top {len(shortlist)} of {total} for this query):\n"
+            + "".join(lines))
 
 # ----------------- Enhanced Agent with More AI Features -----------------
+def resolve_event_name(event_name):
+    """Canonical event name for an exact (case-insensitive) match, else None"""
+    event = store.event_by_name(event_name) if event_name else None
+    return event['EventName'] if event is not None else None
+
+@llm.budget(REQUEST_BUDGET)
 def agno_agent(prompt):
+    with request_span("agno_agent") as span:
+        try:
+            # Extract user info from prompt
+            user_name, user_email = extract_user_info(prompt)
+
+            # Known phrasings (every app.py button) skip the model entirely
+            data = route_intent(prompt, resolve_event_name)
+            if data is not None:
+                span.set(path="routed", intent=data.get("intent"))
+                return handle_intent(data, user_name, user_email)
+
+            text = generate_text(classifier_prompt(prompt, user_name, user_email), IntentChoice, hedge=True)
+            try:
+                data = parse_structured(text, IntentChoice)
+            except ValueError as e:
+                log.warning("Intent response invalid: %s", e)
+                span.set(path="invalid")
+                return unparsed_reply(text)
+            span.set(path="classified", intent=data.get("intent"))
+            return handle_intent(data, user_name, user_email)
+
+        except LLMUnavailable as e:
+            log.warning("Intent classification unavailable: %s", e)
+            span.set(path="unavailable")
+            return BUSY_MESSAGE
+
+        except Exception as e:
+            log.exception("Error in agno_agent: %s", e)
+            telemetry.record_error(span, e)
+            return "I encountered an error. Try: 'recommend events', 'compare events', or 'check my schedule'"
+
+BUSY_MESSAGE = "⏱️ The AI is taking too long to respond right now. The buttons above work without it."
+
+def unparsed_reply(text):
+    """Reply for a classifier answer that failed validation, without asking again"""
+    if text and text.strip() and text.lstrip()[0] not in "{[`":
+        return text.strip()
+    return HELP_MESSAGE
+
+def agno_agent_stream(prompt):
+    """agno_agent that yields the reply in chunks as the model produces it.
+
+    Tool replies (including lists of events) arrive as a single item. For
+    conversational intents the "response" field is streamed out of the
+    classifier's JSON while it is still being generated.
+
+    The request's span and budget live in a context of their own that is
+    entered only while a chunk is being produced, so a caller that stops
+    reading (or reads slowly) never sees them.
+    """
+    context = contextvars.copy_context()
+    chunks = _agno_agent_stream(prompt)
     try:
-        # Extract user info from prompt
-        user_name, user_email = extract_user_info(prompt)
-        
-        # Build comprehensive system message
-        system_message = f"""You are an advanced AI event management assistant with autonomous capabilities.
+        while True:
+            try:
+                chunk = context.run(next, chunks)
+            except StopIteration:
+                return
+            yield chunk
+    finally:
+        context.run(chunks.close)
+
+def _agno_agent_stream(prompt):
+    user_name, user_email = extract_user_info(prompt)
+    with request_span("agno_agent_stream") as span:
+        try:
+            # The same request budget as agno_agent, over every chunk
+            with llm.budget(REQUEST_BUDGET):
+                data = route_intent(prompt, resolve_event_name)
+                if data is not None:
+                    span.set(path="routed", intent=data.get("intent"))
+                    yield handle_intent(data, user_name, user_email)
+                    return
+
+                text = sent = ""
+                for chunk in generate_text_stream(classifier_prompt(prompt, user_name, user_email), IntentChoice):
+                    text += chunk
+                    if partial_string_field(text, "intent") != "conversational":
+                        continue
+                    answer = partial_string_field(text, "response")
+                    if answer and answer.startswith(sent) and len(answer) > len(sent):
+                        yield answer[len(sent):]
+                        sent = answer
+                try:
+                    data = parse_structured(text, IntentChoice)
+                except ValueError as e:
+                    log.warning("Intent response invalid: %s", e)
+                    span.set(path="invalid")
+                    if not sent:
+                        yield unparsed_reply(text)
+                    return
+                span.set(path="classified", intent=data.get("intent"))
+                if sent:
+                    rest = (data["response"] or "")[len(sent):]
+                    if rest:
+                        yield rest
+                    return
+                yield handle_intent(data, user_name, user_email)
+        except LLMUnavailable as e:
+            log.warning("Intent classification unavailable: %s", e)
+            span.set(path="unavailable")
+            yield BUSY_MESSAGE
+        except Exception as e:
+            log.exception("Error in agno_agent_stream: %s", e)
+            telemetry.record_error(span, e)
+            yield "I encountered an error. Try: 'recommend events', 'compare events', or 'check my schedule'"
+
+def classifier_prompt(prompt, user_name, user_email):
+    """Intent-classification prompt for free text the router can't place"""
+    system_message = f"""You are an advanced AI event management assistant with autonomous capabilities.
 
-{get_event_context()}
+{get_event_context(prompt)}
 
 User Information:
 - Name: {user_name if user_name else 'Not provided'}
@@ -675,7 +913,13 @@ AVAILABLE AI CAPABILITIES:
 7. "compare" - Compare two events with AI analysis
 8. "schedule_check" - Check for scheduling conflicts
 9. "suggest_by_date" - AI suggests events around a date
-10. "conversational" - General questions and natural conversation
+10. "auto_book" - AI picks priority events to auto-book
+11. "overbooking_check" - Check if the user is overcommitted
+12. "seat_report" - Seat utilization optimization report
+13. "cluster" - Group events into categories
+14. "forecast" - Predict attendance for an event
+15. "notifications" - Show the user's reminder schedule
+16. "conversational" - General questions and natural conversation
 
 Return ONLY valid JSON:
 {{
@@ -693,92 +937,31 @@ Examples:
 - "Check my schedule" → {{"intent": "schedule_check"}}
 - "What events are happening next week?" → {{"intent": "suggest_by_date", "date": "2025-10-12"}}
 """
+    return system_message + "\n\nUser Query: " + prompt
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=system_message + "\n\nUser Query: " + prompt
-        )
-        
-        text = response.text.strip()
-        print("GenAI response:", text)
-        
-        # Clean markdown code blocks
-        text = re.sub(r"^```json\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"^```\s*", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"\s*```$", "", text, flags=re.IGNORECASE)
-        
-        data = json.loads(text.strip())
-        intent = data.get("intent", "").lower()
-        
-        # Handle AI-powered actions
-        if intent == "recommend":
-            prefs = data.get("preferences")
-            result = smart_event_recommendation(user_email or "", prefs)
-            if result and 'recommendations' in result:
-                msg = "🤖 AI Event Recommendations for You:\n\n"
-                for rec in result['recommendations']:
-                    msg += f"✨ {rec['event_name']}\n   Why: {rec['reason']}\n\n"
-                return msg
-            return "Let me analyze your preferences and suggest events..."
-        
-        elif intent == "compare":
-            event1 = data.get("event", "")
-            event2 = data.get("event2", "")
-            return f"🤖 AI Comparison:\n\n{intelligent_event_comparison(event1, event2)}"
-        
-        elif intent == "schedule_check":
-            if not user_email:
-                return "Please provide your email to check schedule conflicts."
-            # Get all user bookings and analyze
-            bookings_data = get_user_bookings(user_email)
-            if isinstance(bookings_data, str):
-                return bookings_data
-            msg = "📅 Your Schedule:\n\n"
-            for booking in bookings_data:
-                msg += f"• {booking['EventName']} - {booking['Date']} at {booking['Time']}\n"
-            msg += "\n✅ AI detected no scheduling conflicts!"
-            return msg
-        
-        elif intent == "suggest_by_date":
-            target_date = data.get("date")
-            result = auto_event_suggestions_by_date(target_date)
-            if result and 'suggestions' in result:
-                msg = "🤖 AI Event Suggestions:\n\n"
-                for sug in result['suggestions']:
-                    msg += f"📅 {sug['event_name']} ({sug['date']})\n   {sug['reason']}\n\n"
-                return msg
-            return "Looking for events around that date..."
-        
-        # Original intents
-        elif intent == "register":
-            event_name = data.get("event", "")
-            return register_attendee(user_name or "User", user_email or "", event_name)
-        
-        elif intent == "cancel":
-            event_name = data.get("event", "")
-            return cancel_booking(user_email or "", event_name)
-        
-        elif intent == "show_events":
-            date = data.get("date")
-            return show_events_by_date(date)
-        
-        elif intent == "seats_left":
-            event_name = data.get("event", "")
-            result = seats_left(event_name)
-            if isinstance(result, int):
-                event = find_event(event_name)
-                if not event.empty:
-                    return f"🎟️ There are {result} seats available for {event['EventName'].values[0]}."
-            return result
-        
-        elif intent == "my_bookings":
-            return get_user_bookings(user_email or "")
-        
-        elif intent == "conversational":
-            return data.get("response", "I'm here to help with event management!")
-        
-        else:
-            return """🤖 AI Event Assistant Ready!
+def handle_intent(data, user_name, user_email):
+    """Run the tool for a classified intent and return its reply"""
+    return dispatch(
+        (data.get("intent") or "").lower(),
+        name=user_name,
+        email=user_email,
+        event=data.get("event"),
+        event2=data.get("event2"),
+        date=data.get("date"),
+        preferences=data.get("preferences"),
+        response=data.get("response")
+    ).reply
+
+# ----------------- Direct Action API -----------------
+@dataclass
+class ActionResult:
+    """Outcome of dispatch(): raw tool output plus the chat-ready reply"""
+    action: str
+    ok: bool
+    data: Any = None
+    reply: Any = ""
+
+HELP_MESSAGE = """🤖 AI Event Assistant Ready!
 
 I can help you with:
 ✅ Smart event recommendations based on your preferences
@@ -794,36 +977,282 @@ Try asking:
 • "Check my schedule for conflicts"
 • "What events next week?"
 """
-    
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing error: {e}")
-        print(f"Raw response: {text}")
-        return get_conversational_response(prompt, user_name, user_email)
-    
-    except Exception as e:
-        print(f"Error in agno_agent: {e}")
-        import traceback
-        traceback.print_exc()
-        return "I encountered an error. Try: 'recommend events', 'compare events', or 'check my schedule'"
 
-def get_conversational_response(prompt, user_name=None, user_email=None):
-    """Fallback for pure conversational responses"""
-    try:
-        context = get_event_context()
-        system_message = f"""You are a helpful AI event management assistant with advanced capabilities.
+def recommend_result(result):
+    if result and 'recommendations' in result:
+        msg = "🤖 AI Event Recommendations for You:\n\n"
+        for rec in result['recommendations']:
+            msg += f"✨ {rec['event_name']}\n   Why: {rec['reason']}\n\n"
+        return ActionResult("recommend", True, result['recommendations'], msg)
+    return ActionResult("recommend", False, None, "Let me analyze your preferences and suggest events...")
+
+def compare_result(comparison):
+    return ActionResult("compare", True, comparison, f"🤖 AI Comparison:\n\n{comparison}")
+
+def suggest_result(result):
+    if result and 'suggestions' in result:
+        msg = "🤖 AI Event Suggestions:\n\n"
+        for sug in result['suggestions']:
+            msg += f"📅 {sug['event_name']} ({sug['date']})\n   {sug['reason']}\n\n"
+        return ActionResult("suggest_by_date", True, result['suggestions'], msg)
+    return ActionResult("suggest_by_date", False, None, "Looking for events around that date...")
+
+@llm.budget(REQUEST_BUDGET)
+def dispatch(action, name=None, email=None, event=None, event2=None, date=None, preferences=None, response=None):
+    """Call the tool behind an action directly, without any model round trip.
+
+    The UI uses this for its buttons; agno_agent uses it after routing or
+    classifying free text. Unknown actions return the help message.
+    """
+    with telemetry.span("agent.dispatch", action=action) as span:
+        result = _dispatch(action, name, email, event, event2, date, preferences, response)
+        span.set(ok=result.ok)
+        return result
+
+def _dispatch(action, name, email, event, event2, date, preferences, response):
+    if action == "recommend":
+        return recommend_result(smart_event_recommendation(email or "", preferences))
+    
+    elif action == "compare":
+        return compare_result(intelligent_event_comparison(event or "", event2 or ""))
+    
+    elif action == "schedule_check":
+        if not email:
+            return ActionResult(action, False, None, "Please provide your email to check schedule conflicts.")
+        # Get all user bookings and analyze
+        bookings_data = get_user_bookings(email)
+        if isinstance(bookings_data, str):
+            return ActionResult(action, False, None, bookings_data)
+        msg = "📅 Your Schedule:\n\n"
+        for booking in bookings_data:
+            msg += f"• {booking['EventName']} - {booking['Date']} at {booking['Time']}\n"
+        msg += "\n✅ AI detected no scheduling conflicts!"
+        return ActionResult(action, True, bookings_data, msg)
+    
+    elif action == "suggest_by_date":
+        return suggest_result(auto_event_suggestions_by_date(date))
+    
+    elif action == "register":
+        msg = register_attendee(name or "User", email or "", event or "")
+        return ActionResult(action, msg.startswith("✅"), msg, msg)
+    
+    elif action == "cancel":
+        msg = cancel_booking(email or "", event or "")
+        return ActionResult(action, msg.startswith("✅"), msg, msg)
+    
+    elif action == "show_events":
+        result = show_events_by_date(date)
+        return ActionResult(action, isinstance(result, list), result, result)
+    
+    elif action == "seats_left":
+        result = seats_left(event or "")
+        if isinstance(result, int):
+            event_name = resolve_event_name(event)
+            return ActionResult(action, True, result, f"🎟️ There are {result} seats available for {event_name}.")
+        return ActionResult(action, False, None, result)
+    
+    elif action == "my_bookings":
+        result = get_user_bookings(email or "")
+        return ActionResult(action, isinstance(result, list), result, result)
+    
+    elif action == "auto_book":
+        picks = auto_priority_booking(email or "")
+        if not picks:
+            return ActionResult(action, False, [], "🤖 AI found no high-priority matches to auto-book right now.")
+        msg = "⚡ AI Priority Picks:\n\n"
+        for pick in picks:
+            msg += f"✨ {pick['event']}\n   Why: {pick['reason']}\n\n"
+        return ActionResult(action, True, picks, msg)
+    
+    elif action == "overbooking_check":
+        check = intelligent_overbooking_prevention(email or "")
+        if check.get("status") == "warning":
+            return ActionResult(action, True, check, f"{check['message']}\n\n💡 {check['suggestion']}")
+        return ActionResult(action, True, check, "✅ AI check complete: your booking load looks healthy.")
+    
+    elif action == "seat_report":
+        report = auto_seat_allocation_optimizer()
+        if not report:
+            return ActionResult(action, True, report, "✅ All events are within healthy seat utilization.")
+        msg = "📊 AI Seat Optimization Report:\n\n"
+        for item in report:
+            msg += f"• {item['event']}: {item['status']} ({item['utilization']})\n   {item['ai_action']}\n"
+        return ActionResult(action, True, report, msg)
+    
+    elif action == "cluster":
+        result = auto_event_clustering()
+        if not result or 'clusters' not in result:
+            return ActionResult(action, False, None, "Unable to categorize events at this time.")
+        msg = "📁 AI Event Categories:\n\n"
+        for category, names in result['clusters'].items():
+            msg += f"• {category}: {', '.join(names)}\n"
+        return ActionResult(action, True, result['clusters'], msg)
+    
+    elif action == "forecast":
+        forecast = predictive_attendance_forecast(event or "")
+        if not forecast:
+            return ActionResult(action, False, None, f"Unable to forecast attendance for {event}.")
+        msg = (f"🔮 Attendance Forecast for {event}:\n\n"
+               f"Predicted attendance: {forecast.get('predicted_attendance_pct')}% "
+               f"(confidence: {forecast.get('confidence')})\n"
+               f"{forecast.get('insights', '')}\n\n💡 {forecast.get('recommendation', '')}")
+        return ActionResult(action, True, forecast, msg)
+    
+    elif action == "notifications":
+        notifications = auto_notification_scheduler(email or "")
+        if not notifications:
+            return ActionResult(action, False, [], "You have no upcoming events to schedule notifications for.")
+        msg = "🔔 AI Notification Schedule:\n\n"
+        for note in notifications:
+            msg += f"• {note['event']} ({note['date']}): {', '.join(note['reminders'])}\n"
+        return ActionResult(action, True, notifications, msg)
+    
+    elif action == "conversational":
+        msg = response or "I'm here to help with event management!"
+        return ActionResult(action, True, msg, msg)
+    
+    return ActionResult(action, False, None, HELP_MESSAGE)
+
+def conversational_prompt(prompt, user_name=None, user_email=None):
+    context = get_event_context(prompt)
+    system_message = f"""You are a helpful AI event management assistant with advanced capabilities.
 
 {context}
 
 User: {user_name if user_name else 'Guest'} ({user_email if user_email else 'No email'})
 
 Answer naturally and mention that you can provide AI-powered recommendations, comparisons, and conflict detection."""
+    return system_message + "\n\nUser Query: " + prompt
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=system_message + "\n\nUser Query: " + prompt
-        )
-        
-        return response.text.strip()
+@traced("ai.conversation")
+def get_conversational_response(prompt, user_name=None, user_email=None):
+    """Fallback for pure conversational responses"""
+    try:
+        return generate_text(conversational_prompt(prompt, user_name, user_email), hedge=True)
     except Exception as e:
-        print(f"Error in conversational response: {e}")
+        fell_back("conversation", e)
         return "I'm your AI assistant! Ask me to recommend events, compare options, or check your schedule!"
+
+# ----------------- Async Execution -----------------
+# Async counterparts for servers running an event loop. Model calls use
+# the backend's async API and independent ones are gathered; store
+# lookups are blocking, so they run on worker threads instead.
+@traced("ai.recommendation")
+async def smart_event_recommendation_async(user_email, preferences=None):
+    prompt = await asyncio.to_thread(_recommendation_prompt, user_email, preferences)
+    if prompt is None:
+        return None
+    result = await generate_json_async(prompt, Recommendations)
+    if result and result.get('recommendations'):
+        return result
+    return await asyncio.to_thread(local_recommendations, user_email, preferences)
+
+@traced("ai.suggestions")
+async def auto_event_suggestions_by_date_async(target_date=None):
+    prompt = await asyncio.to_thread(_suggestions_prompt, target_date)
+    result = await generate_json_async(prompt, Suggestions)
+    if result and result.get('suggestions'):
+        return result
+    return await asyncio.to_thread(local_suggestions, target_date)
+
+@traced("ai.comparison")
+async def intelligent_event_comparison_async(event1, event2):
+    prompt = await asyncio.to_thread(_comparison_prompt, event1, event2)
+    if prompt is None:
+        return "One or both events not found."
+    try:
+        return await generate_text_async(prompt)
+    except Exception as e:
+        fell_back("comparison", e)
+        return await asyncio.to_thread(local_comparison, event1, event2)
+
+@traced("ai.cancellation")
+async def smart_cancellation_assistant_async(email, event_name):
+    """smart_cancellation_assistant with both model calls in flight at once.
+
+    The advice call is given a local shortlist of open events on other
+    dates instead of waiting for the AI recommendations, which are
+    appended to the reply once both calls return.
+    """
+    event = find_event(event_name)
+    if event.empty:
+        return None
+    event_date = str(event['Date'].values[0])
+    alternatives = [
+        row['EventName']
+        for row in retriever.top_k(event_name, k=6, available_only=True)
+        if row['EventName'] != event['EventName'].values[0]
+    ][:5]
+    prompt = _cancellation_prompt(event_name, event_date, alternatives)
+
+    recommendations, advice = await asyncio.gather(
+        smart_event_recommendation_async(email),
+        generate_text_async(prompt),
+        return_exceptions=True
+    )
+    if isinstance(advice, Exception):
+        advice = "Proceed with cancellation if needed."
+    if isinstance(recommendations, dict) and recommendations.get('recommendations'):
+        picks = ", ".join(rec['event_name'] for rec in recommendations['recommendations'])
+        advice += f"\n\n🤖 You might also like: {picks}"
+    return advice
+
+async def dispatch_async(action, name=None, email=None, event=None, event2=None, date=None, preferences=None, response=None):
+    """dispatch() for async callers; model-backed actions await the backend directly"""
+    if action not in ("recommend", "compare", "suggest_by_date"):
+        return await asyncio.to_thread(
+            dispatch, action, name=name, email=email, event=event, event2=event2,
+            date=date, preferences=preferences, response=response
+        )
+    with telemetry.span("agent.dispatch", action=action) as span:
+        if action == "recommend":
+            result = recommend_result(await smart_event_recommendation_async(email or "", preferences))
+        elif action == "compare":
+            result = compare_result(await intelligent_event_comparison_async(event or "", event2 or ""))
+        else:
+            result = suggest_result(await auto_event_suggestions_by_date_async(date))
+        span.set(ok=result.ok)
+        return result
+
+async def agno_agent_async(prompt):
+    """agno_agent for an event loop: same routing, non-blocking model calls"""
+    with request_span("agno_agent_async") as span:
+        try:
+            with llm.budget(REQUEST_BUDGET):
+                return await _agno_agent_async(prompt, span)
+        except LLMUnavailable as e:
+            log.warning("Intent classification unavailable: %s", e)
+            span.set(path="unavailable")
+            return BUSY_MESSAGE
+        except Exception as e:
+            log.exception("Error in agno_agent_async: %s", e)
+            telemetry.record_error(span, e)
+            return "I encountered an error. Try: 'recommend events', 'compare events', or 'check my schedule'"
+
+async def _agno_agent_async(prompt, span):
+    user_name, user_email = extract_user_info(prompt)
+    data = route_intent(prompt, resolve_event_name)
+    if data is None:
+        text = await generate_text_async(
+            await asyncio.to_thread(classifier_prompt, prompt, user_name, user_email), IntentChoice, hedge=True
+        )
+        try:
+            data = parse_structured(text, IntentChoice)
+        except ValueError as e:
+            log.warning("Intent response invalid: %s", e)
+            span.set(path="invalid")
+            return unparsed_reply(text)
+        span.set(path="classified", intent=data.get("intent"))
+    else:
+        span.set(path="routed", intent=data.get("intent"))
+    result = await dispatch_async(
+        (data.get("intent") or "").lower(),
+        name=user_name,
+        email=user_email,
+        event=data.get("event"),
+        event2=data.get("event2"),
+        date=data.get("date"),
+        preferences=data.get("preferences"),
+        response=data.get("response")
+    )
+    return result.reply
@@ -0,0 +1,71 @@
+import threading
+
+
+def render_event_line(event, seats):
+    return (f"- {event['EventName']}: {event['Date']} at {event['Time']}, Venue: {event['Venue']}, "
+            f"Capacity: {event['Capacity']}, Seats Left: {seats}\n")
+
+
+class EventContext:
+    """The "Available Events" prompt text, rebuilt only when data changes.
+
+    Stores that report changes (EventStore) call back with the EventID
+    whose seat count moved, and only that line is re-rendered. Stores that
+    can't (SQLite, where other processes write) are detected through
+    store.version and re-rendered from one bulk count query.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._lines = {}
+        self._dirty = set()
+        self._stale = True
+        self._text = None
+        self._version = None
+        if store.tracks_changes:
+            store.add_listener(self._invalidate)
+
+    def _invalidate(self, event_id):
+        with self._lock:
+            if event_id is None:
+                self._stale = True
+            else:
+                self._dirty.add(event_id)
+            self._text = None
+
+    def lines_for(self, event_ids):
+        """Rendered lines of just these events, in the order given"""
+        with self._lock:
+            self._refresh()
+            return [self._lines[event_id] for event_id in event_ids]
+
+    def render(self):
+        """Full context text for the prompt"""
+        with self._lock:
+            self._refresh()
+            if self._text is None:
+                self._text = "Available Events:\n" + "".join(self._lines.values())
+            return self._text
+
+    def _refresh(self):
+        version = self.store.version
+        if not self.store.tracks_changes and version != self._version:
+            self._stale = True
+        if self._stale:
+            counts = self.store.registered_counts()
+            self._lines = {
+                event['EventID']: render_event_line(event, int(event['Capacity']) - counts.get(event['EventID'], 0))
+                for event in self.store.event_rows()
+            }
+            self._dirty.clear()
+            self._stale = False
+            self._text = None
+        elif self._dirty:
+            for event_id in self._dirty:
+                event = self.store.event_by_id(event_id)
+                if event is not None:
+                    self._lines[event_id] = render_event_line(event, self.store.seats_left(event_id))
+            self._dirty.clear()
+            self._text = None
+        self._version = version
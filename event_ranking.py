@@ -0,0 +1,259 @@
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import date
+import numpy as np
+import pandas as pd
+import telemetry
+from retrieval import TOKEN, tokenize
+
+SORTS = ('AI Recommended', 'Date', 'Name', 'Availability')
+# Weights of the "AI Recommended" score: similarity to the user's own
+# bookings, fill rate, and how soon the event is (a month away scores half)
+RECOMMEND_WEIGHTS = {'affinity': 3.0, 'popularity': 1.0, 'soon': 1.0}
+SOON_DAYS = 30
+# Share of affinity that comes from venues rather than name tokens
+VENUE_SHARE = 0.3
+# Per-user rankings are reused until the user's bookings change, the
+# catalog is swapped or they are this many seconds old
+RECOMMEND_TTL = 300
+MAX_CACHED_USERS = 64
+# Seat changes patched into the availability order before a full re-sort
+MAX_PATCHES = 1024
+
+
+def first_by_key(positions, keys, limit=None):
+    """positions ordered by their keys; with a limit, only the first limit
+    are selected (argpartition) and sorted"""
+    if limit is not None and 0 < limit < len(positions):
+        top = np.argpartition(keys, limit - 1)[:limit]
+        return positions[top[np.argsort(keys[top], kind='stable')]]
+    return positions[np.argsort(keys, kind='stable')][:limit]
+
+
+class EventRanking:
+    """Orderings of the catalog for the event list's "Sort by" box.
+
+    Date (date and time, malformed last) and Name (normalized) orders
+    are sorted once per catalog snapshot. Availability (most seats left
+    first) is kept as a sorted array of keys: stores that report changes
+    call back with the EventID whose bookings moved, and only that
+    event's key is moved to its new place; other stores are re-sorted
+    when store.version moves. Either way the first k events of an
+    ordering are a slice.
+
+    "AI Recommended" is a per-user ranking scored locally from the
+    user's bookings (shared name tokens and venues), fill rate and how
+    soon the event is; open, upcoming events the user hasn't booked come
+    first, the rest follow in date order. It is cached per user (see
+    RECOMMEND_TTL) rather than recomputed on every render.
+    """
+
+    def __init__(self, store, ttl=RECOMMEND_TTL):
+        self.store = store
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._indexes = {}
+        self._seats = None
+        self._keys = None
+        self._dirty = set()
+        self._stale = True
+        self._version = None
+        self._users = OrderedDict()
+        if store.tracks_changes:
+            store.add_listener(self._invalidate)
+
+    def _invalidate(self, event_id):
+        with self._lock:
+            if event_id is None:
+                self._stale = True
+            else:
+                self._dirty.add(event_id)
+
+    def order(self, sort_by, catalog, user_email=None, positions=None, limit=None):
+        """The first limit positions of catalog in sort_by order, out of
+        positions (default: every event)"""
+        with self._lock:
+            self._sync(catalog)
+            if sort_by == 'AI Recommended':
+                ranked, rank = self._recommended(catalog, user_email)
+            elif sort_by == 'Availability':
+                self._refresh_seats(catalog)
+                n = max(len(catalog.rows), 1)
+                if positions is None:
+                    return self._keys[:limit] % n
+                return first_by_key(positions, self._key(positions), limit)
+            else:
+                ranked, rank = self._static(sort_by)
+        if positions is None:
+            return ranked[:limit]
+        return first_by_key(positions, rank[positions], limit)
+
+    # ----------------- Catalog orders -----------------
+    def _sync(self, catalog):
+        if catalog is not self._catalog:
+            self._catalog = catalog
+            self._indexes = {}
+            self._stale = True
+
+    def _index(self, name, build):
+        index = self._indexes.get(name)
+        if index is None:
+            with telemetry.span("event_ranking.build", index=name):
+                index = self._indexes[name] = build(self._catalog)
+        return index
+
+    def _static(self, sort_by):
+        """(order, rank) for Date or Name"""
+        return self._index(sort_by, _date_order if sort_by == 'Date' else _name_order)
+
+    # ----------------- Availability -----------------
+    def _key(self, positions):
+        """Sort keys: most seats left first, then catalog order"""
+        return -self._seats[positions] * max(len(self._catalog.rows), 1) + positions
+
+    def _refresh_seats(self, catalog):
+        store = self.store
+        version = store.version
+        if not store.tracks_changes and version != self._version:
+            self._stale = True
+        if self._stale or len(self._dirty) > MAX_PATCHES:
+            with telemetry.span("event_ranking.build", index='Availability'):
+                self._seats = catalog.capacity - self._registered(catalog)
+                self._keys = np.sort(self._key(np.arange(len(catalog.rows))))
+            self._stale = False
+        else:
+            for event_id in self._dirty:
+                pos = catalog.positions.get(event_id)
+                if pos is not None:
+                    self._move(pos, int(catalog.capacity[pos]) - store.registered_count(event_id))
+        self._dirty.clear()
+        self._version = version
+
+    def _move(self, pos, seats):
+        """Give pos a new seat count, shifting only the keys between its old and new place"""
+        old = self._key(pos)
+        self._seats[pos] = seats
+        new = self._key(pos)
+        if new == old:
+            return
+        keys = self._keys
+        i = int(np.searchsorted(keys, old))
+        j = int(np.searchsorted(keys, new))
+        if j > i:
+            keys[i:j - 1] = keys[i + 1:j]
+            keys[j - 1] = new
+        else:
+            keys[j + 1:i + 1] = keys[j:i]
+            keys[j] = new
+
+    def _registered(self, catalog):
+        """Registered bookings per event, in catalog order"""
+        current, registered = self.store.seat_counts()
+        if current is not catalog:
+            # The store swapped catalogs since the caller read it
+            registered = np.array([self.store.registered_count(event_id)
+                                   for event_id in catalog.events['EventID'].tolist()], dtype=np.int64)
+        return registered
+
+    # ----------------- AI Recommended -----------------
+    def _recommended(self, catalog, user_email):
+        """(order, rank) for a user, from the cache while it's fresh"""
+        store = self.store
+        attendee = store.attendee_by_email(user_email) if user_email else None
+        bookings = store.bookings_for_attendee(attendee['AttendeeID']) if attendee is not None else []
+        key = (catalog, tuple((booking['EventID'], booking['Status']) for booking in bookings))
+        entry = self._users.get(user_email)
+        if entry is not None and entry[0] == key and time.monotonic() - entry[1] < self.ttl:
+            self._users.move_to_end(user_email)
+            telemetry.metrics.inc('event_ranking_requests_total', result='hit')
+            return entry[2]
+        telemetry.metrics.inc('event_ranking_requests_total', result='miss')
+        with telemetry.span("event_ranking.recommend", bookings=len(bookings)):
+            ranked = self._recommend(catalog, bookings)
+        self._users[user_email] = (key, time.monotonic(), ranked)
+        self._users.move_to_end(user_email)
+        while len(self._users) > MAX_CACHED_USERS:
+            self._users.popitem(last=False)
+        return ranked
+
+    def _recommend(self, catalog, bookings):
+        n = len(catalog.rows)
+        capacity = catalog.capacity
+        registered = self._registered(catalog)
+        days = (catalog.dates - np.datetime64(date.today(), 'D')) / np.timedelta64(1, 'D')
+        upcoming = days >= 0
+        score = RECOMMEND_WEIGHTS['popularity'] * np.clip(registered / np.maximum(capacity, 1), 0, 1)
+        score[upcoming] += RECOMMEND_WEIGHTS['soon'] / (1 + days[upcoming] / SOON_DAYS)
+        score += RECOMMEND_WEIGHTS['affinity'] * self._affinity(catalog, bookings)
+        booked = np.zeros(n, dtype=bool)
+        booked[[pos for pos in (catalog.positions.get(b['EventID']) for b in bookings) if pos is not None]] = True
+        eligible = upcoming & (capacity > registered) & ~booked
+        picks = np.flatnonzero(eligible)
+        date_order = self._static('Date')[0]
+        ranked = np.concatenate([picks[np.argsort(-score[picks], kind='stable')],
+                                 date_order[~eligible[date_order]]]).astype(np.int32)
+        rank = np.empty(n, dtype=np.int32)
+        rank[ranked] = np.arange(n, dtype=np.int32)
+        return ranked, rank
+
+    def _affinity(self, catalog, bookings):
+        """0-1 similarity of each event to the events the user booked"""
+        n = len(catalog.rows)
+        affinity = np.zeros(n)
+        booked = [catalog.event_by_id(booking['EventID']) for booking in bookings]
+        booked = [event for event in booked if event is not None]
+        if not booked:
+            return affinity
+        postings = self._index('terms', _name_terms)
+        for term, count in Counter(token for event in booked for token in set(tokenize(event['EventName']))).items():
+            positions = postings.get(term)
+            if positions is not None:
+                affinity[positions] += count * math.log(1 + n / len(positions))
+        if affinity.max() > 0:
+            affinity *= (1 - VENUE_SHARE) / affinity.max()
+        venue_codes, venues = self._index('venues', _venue_codes)
+        visits = Counter(venues.get(str(event['Venue'])) for event in booked)
+        weights = np.array([visits.get(code, 0) for code in range(len(venues))], dtype=float)
+        if len(weights) and weights.max() > 0:
+            affinity += VENUE_SHARE * weights[venue_codes] / weights.max()
+        return affinity
+
+
+# ----------------- Index builders -----------------
+def _with_rank(order):
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return order, rank
+
+
+def _date_order(catalog):
+    """Start date and time, then catalog order; malformed dates last"""
+    events = catalog.events
+    starts = pd.to_datetime(events['Date'].astype(str) + ' ' + events['Time'].astype(str),
+                            format='%Y-%m-%d %H:%M', errors='coerce').to_numpy()
+    # Unparseable times still sort by their date
+    starts = np.where(np.isnat(starts), catalog.dates.astype(starts.dtype), starts)
+    return _with_rank(np.argsort(starts, kind='stable'))
+
+
+def _name_order(catalog):
+    names = catalog.events['EventName'].astype(str).str.strip().str.lower()
+    return _with_rank(np.argsort(names.to_numpy(dtype=str), kind='stable'))
+
+
+def _name_terms(catalog):
+    """{name token: positions of the events whose name has it}"""
+    tokens = pd.Series(catalog.events['EventName'].astype(str).str.lower().to_numpy()).str.findall(TOKEN.pattern)
+    tokens = tokens.explode().dropna()
+    pairs = pd.DataFrame({'term': tokens.to_numpy(), 'pos': tokens.index.to_numpy()}).drop_duplicates()
+    positions = pairs['pos'].to_numpy(dtype=np.int64)
+    return {term: positions[rows] for term, rows in pairs.groupby('term').indices.items()}
+
+
+def _venue_codes(catalog):
+    """(venue code per event, {venue: code})"""
+    codes, venues = pd.factorize(catalog.events['Venue'].astype(str))
+    return codes, {venue: code for code, venue in enumerate(venues)}
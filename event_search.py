@@ -0,0 +1,238 @@
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+import numpy as np
+import pandas as pd
+from retrieval import TOKEN, tokenize
+
+# Weight of a token by the field it was found in
+FIELD_WEIGHTS = {'EventName': 3.0, 'Venue': 2.0, 'Date': 1.0}
+# Match quality of an indexed token for a query token
+EXACT = 1.0
+PREFIX = 0.8
+FUZZY = 0.6
+# Most indexed tokens one query token expands to by prefix
+MAX_EXPANSIONS = 64
+ISO_DATE = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_typos(term):
+    """Edits a query token may be away from an indexed token"""
+    return 0 if len(term) < 4 else 1 if len(term) < 8 else 2
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (swaps count as one edit), or limit + 1 past limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def normalize_query(query):
+    """Query text with YYYY-MM-DD dates run together, matching how dates are indexed"""
+    return ISO_DATE.sub(r'\1\2\3', str(query))
+
+
+class EventSearchIndex:
+    """Inverted index over event name, venue and date for the event search box.
+
+    Each query token matches indexed tokens exactly, as a prefix (so
+    results appear while the user is still typing) or within one or two
+    edits (typos; candidates come from a trigram index over the
+    vocabulary). Events are ranked by how many query tokens they match,
+    then by match quality x field weight x idf, then catalog order.
+
+    Postings point at documents, one per distinct (EventID, name, venue,
+    date). When the store swaps in a new catalog, only events whose
+    document is new get tokenized; documents no longer in the catalog
+    are skipped in results and dropped at the next full rebuild.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._clear()
+
+    def _clear(self):
+        self._docs = {}
+        self._postings = {}
+        self._arrays = {}
+        self._vocab = []
+        self._trigrams = {}
+        self._doc_pos = np.empty(0, dtype=np.int64)
+
+    # ----------------- Indexing -----------------
+    def _sync(self, catalog):
+        """Point the index at catalog, indexing the events it hasn't seen"""
+        if catalog is self._catalog:
+            return
+        events = catalog.events
+        n = len(events)
+        if len(self._docs) > 2 * max(n, 1024):
+            # Mostly documents of events that are gone
+            self._clear()
+        docs = np.empty(n, dtype=np.int64)
+        new = []
+        columns = zip(events['EventID'].tolist(), events['EventName'].astype(str).tolist(),
+                      events['Venue'].astype(str).tolist(), events['Date'].astype(str).tolist())
+        for pos, key in enumerate(columns):
+            doc = self._docs.get(key)
+            if doc is None:
+                doc = self._docs[key] = len(self._docs)
+                new.append((doc, key))
+            docs[pos] = doc
+        if new:
+            self._add(new)
+        doc_pos = np.full(len(self._docs), -1, dtype=np.int64)
+        doc_pos[docs] = np.arange(n)
+        self._doc_pos = doc_pos
+        self._catalog = catalog
+
+    def _add(self, new):
+        """Index (doc, key) pairs in one vectorized pass.
+
+        Each field is tokenized once per distinct value (venues and dates
+        repeat a lot), then expanded to postings with numpy.
+        """
+        docs = np.fromiter((doc for doc, _ in new), dtype=np.int64, count=len(new))
+        term_ids = {}
+        parts = []
+        for field, column in (('EventName', 1), ('Venue', 2), ('Date', 3)):
+            codes, values = pd.factorize(pd.Series([key[column] for _, key in new], dtype=object))
+            texts = [str(value).lower() for value in values]
+            if field == 'Date':
+                # The date as written, run together (see normalize_query) and
+                # as month and weekday names
+                words = pd.to_datetime(pd.Series(texts), format='%Y-%m-%d', errors='coerce').dt.strftime('%B %A')
+                texts = [f"{text} {text.replace('-', '')} {word.lower() if isinstance(word, str) else ''}"
+                         for text, word in zip(texts, words)]
+            value_ids, value_terms = [], []
+            for value_id, text in enumerate(texts):
+                for token in set(TOKEN.findall(text)):
+                    value_ids.append(value_id)
+                    value_terms.append(term_ids.setdefault(token, len(term_ids)))
+            value_ids = np.array(value_ids, dtype=np.int64)
+            # Docs grouped by value, then one run of them per (value, term) pair
+            by_value = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes, minlength=len(texts))
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            lengths = counts[value_ids]
+            offsets = np.repeat(starts[value_ids] - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+            parts.append((np.repeat(np.array(value_terms, dtype=np.int64), lengths),
+                          docs[by_value[offsets + np.arange(lengths.sum())]],
+                          np.full(lengths.sum(), FIELD_WEIGHTS[field])))
+        terms, term_docs, weights = (np.concatenate(arrays) for arrays in zip(*parts))
+        # One posting per (term, doc), keeping its best field weight
+        order = np.lexsort((-weights, term_docs, terms))
+        terms, term_docs, weights = terms[order], term_docs[order], weights[order]
+        first = np.ones(len(terms), dtype=bool)
+        first[1:] = (terms[1:] != terms[:-1]) | (term_docs[1:] != term_docs[:-1])
+        terms, term_docs, weights = terms[first], term_docs[first], weights[first]
+        bounds = np.flatnonzero(np.diff(terms)) + 1
+        names = {term_id: term for term, term_id in term_ids.items()}
+        new_terms = False
+        for start, end in zip(np.concatenate([[0], bounds]).tolist(), np.concatenate([bounds, [len(terms)]]).tolist()):
+            term = names[int(terms[start])]
+            chunks = self._postings.get(term)
+            if chunks is None:
+                chunks = self._postings[term] = []
+                new_terms = True
+                for gram in trigrams(term):
+                    self._trigrams.setdefault(gram, set()).add(term)
+            chunks.append((term_docs[start:end], weights[start:end]))
+            self._arrays.pop(term, None)
+        if new_terms:
+            self._vocab = sorted(self._postings)
+
+    def _term_arrays(self, term):
+        """(docs, weights) of a term, its appended chunks merged on first use"""
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            chunks = self._postings[term]
+            if len(chunks) > 1:
+                chunks[:] = [(np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks]))]
+            arrays = self._arrays[term] = chunks[0]
+        return arrays
+
+    # ----------------- Lookup -----------------
+    def _expand(self, token, prefix):
+        """{indexed term: match quality} for one query token"""
+        matches = {}
+        if token in self._postings:
+            matches[token] = EXACT
+        if prefix:
+            vocab = self._vocab
+            i = bisect_left(vocab, token)
+            while i < len(vocab) and len(matches) < MAX_EXPANSIONS and vocab[i].startswith(token):
+                matches.setdefault(vocab[i], PREFIX)
+                i += 1
+        # Numbers and dates must match as typed
+        limit = 0 if any(c.isdigit() for c in token) else max_typos(token)
+        if limit:
+            grams = trigrams(token)
+            shared = Counter(term for gram in grams for term in self._trigrams.get(gram, ()))
+            for term, count in shared.items():
+                # One edit changes at most three trigrams
+                if term in matches or count < len(grams) - 3 * limit:
+                    continue
+                distance = edit_distance(token, term, limit)
+                if distance <= limit:
+                    matches[term] = FUZZY / distance
+        return matches
+
+    def search(self, query, catalog=None, limit=None):
+        """(positions, hits): the best `limit` matches for query as positions in catalog
+        (default store.catalog), best first, and how many events matched in all.
+
+        The last query token also matches as a prefix, since it may still
+        be being typed. An empty query matches every event, in catalog order.
+        """
+        catalog = self.store.catalog if catalog is None else catalog
+        tokens = list(dict.fromkeys(tokenize(normalize_query(query))))
+        if not tokens:
+            return np.arange(len(catalog.rows))[:limit], len(catalog.rows)
+        with self._lock:
+            self._sync(catalog)
+            n = len(self._docs)
+            live = max(len(catalog.rows), 1)
+            score = np.zeros(n)
+            matched = np.zeros(n, dtype=np.int32)
+            for i, token in enumerate(tokens):
+                last = i == len(tokens) - 1
+                best = np.zeros(n)
+                for term, quality in self._expand(token, last and (len(token) > 1 or len(tokens) == 1)).items():
+                    docs, weights = self._term_arrays(term)
+                    idf = math.log(1 + live / len(docs))
+                    best[docs] = np.maximum(best[docs], weights * (quality * idf))
+                score += best
+                matched += best > 0
+            doc_pos = self._doc_pos
+        docs = np.flatnonzero(matched)
+        docs = docs[doc_pos[docs] >= 0]
+        # Matched token count first; scores are far below the step between counts
+        rank = matched[docs] * (score.max() + 1) + score[docs]
+        positions = doc_pos[docs]
+        top = np.arange(len(docs))
+        if limit is not None and limit < len(docs):
+            # Everything that ties with the limit-th best, so ties keep catalog order
+            top = np.flatnonzero(rank >= np.partition(rank, len(rank) - limit)[len(rank) - limit])
+        order = top[np.lexsort((positions[top], -rank[top]))][:limit]
+        return positions[order], len(docs)
@@ -0,0 +1,732 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from booking_journal import BookingJournal
+from booking_table import BookingTable, Interner
+from file_lock import FileLock
+import telemetry
+from telemetry import log
+
+ATTENDEE_COLUMNS = ['AttendeeID', 'Name', 'Email']
+# Formats EventStore can keep its snapshots in
+SNAPSHOT_FORMATS = ('csv', 'arrow')
+# Repeated IDs and the status load from CSV as categoricals, not object strings
+CSV_DTYPES = {'Bookings': {'BookingID': str, 'AttendeeID': 'category', 'EventID': 'category', 'Status': 'category'}}
+
+
+def normalize_name(name):
+    """Normalize an event name for case-insensitive lookups"""
+    return str(name).strip().lower()
+
+
+class IdAllocator:
+    """Monotonic IDs like A004/B017 that never reuse a number already seen"""
+
+    def __init__(self, prefix, width=3):
+        self.prefix = prefix
+        self.width = width
+        self._last = 0
+
+    def observe(self, value):
+        """Account for an existing ID so later allocations skip past it"""
+        digits = str(value)[len(self.prefix):]
+        if digits.isdigit():
+            self._last = max(self._last, int(digits))
+
+    def observe_number(self, number):
+        self._last = max(self._last, number)
+
+    def observe_all(self, values):
+        """observe() for many IDs at once"""
+        digits = pd.Series(values, dtype=object).astype(str).str[len(self.prefix):]
+        numbers = pd.to_numeric(digits[digits.str.isdigit()])
+        if len(numbers):
+            self._last = max(self._last, int(numbers.max()))
+
+    def next(self):
+        self._last += 1
+        return f"{self.prefix}{self._last:0{self.width}}"
+
+
+class FrameRows:
+    """Row dicts over a DataFrame's columns, built on access rather than stored.
+
+    The values stay in the frame: for Arrow snapshots, the memory-mapped
+    pages every process shares. Rows appended later (journal entries) are
+    kept as dicts after the frame's. Returned dicts are fresh copies.
+    """
+
+    CHUNK = 4096
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.columns = list(frame.columns)
+        self.added = []
+        self._arrays = [frame[column].array for column in self.columns]
+
+    def __len__(self):
+        return len(self.frame) + len(self.added)
+
+    def __getitem__(self, pos):
+        n = len(self.frame)
+        if pos < 0:
+            pos += len(self)
+        if pos >= n:
+            return dict(self.added[pos - n])
+        values = (array[pos] for array in self._arrays)
+        return {column: value.item() if isinstance(value, np.generic) else value
+                for column, value in zip(self.columns, values)}
+
+    def __iter__(self):
+        # A chunk of each column at a time; far cheaper than per-row access
+        for start in range(0, len(self.frame), self.CHUNK):
+            chunks = [array[start:start + self.CHUNK].tolist() for array in self._arrays]
+            for values in zip(*chunks):
+                yield dict(zip(self.columns, values))
+        for row in self.added:
+            yield dict(row)
+
+    def append(self, row):
+        self.added.append(row)
+
+    def column(self, name):
+        """All values of one column as a list"""
+        return self.frame[name].tolist() + [row[name] for row in self.added]
+
+    def to_frame(self):
+        """The rows as a DataFrame (the loaded frame itself when nothing was appended)"""
+        if not self.added:
+            return self.frame
+        return pd.concat([self.frame.astype(object), pd.DataFrame(self.added, columns=self.columns)],
+                         ignore_index=True)
+
+
+class RowIndex:
+    """Read-only mapping from a key to a row, holding positions rather than rows"""
+
+    def __init__(self, rows, positions):
+        self.rows = rows
+        self.positions = positions
+
+    def get(self, key, default=None):
+        pos = self.positions.get(key)
+        return default if pos is None else self.rows[pos]
+
+    def __getitem__(self, key):
+        return self.rows[self.positions[key]]
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+
+class CatalogSnapshot:
+    """The events table with its indexes, built once and never changed.
+
+    Stores replace their snapshot as a whole on reload, so code that
+    holds one (store.catalog) sees a single version of every field even
+    while a reload runs. Dates are parsed once (NaT if malformed) and
+    capacities are kept as an array, both in catalog order. Rows are read
+    from the frame's columns on access (see FrameRows); only the ID and
+    name indexes are per-process dicts.
+    """
+
+    def __init__(self, events, version=0):
+        self.events = events
+        self.version = version
+        self.rows = FrameRows(events)
+        ids = events['EventID'].tolist()
+        self.positions = dict(zip(ids, range(len(ids))))
+        # Reversed so the first event with a name wins
+        names = [normalize_name(name) for name in events['EventName'].tolist()]
+        self.name_positions = dict(zip(reversed(names), range(len(names) - 1, -1, -1)))
+        self.dates = pd.to_datetime(events['Date'].astype(str), format='%Y-%m-%d',
+                                    errors='coerce').to_numpy().astype('datetime64[D]')
+        self.capacity = events['Capacity'].to_numpy(dtype=np.int64)
+        self.dates.flags.writeable = False
+        self.capacity.flags.writeable = False
+
+    def event_by_id(self, event_id):
+        pos = self.positions.get(event_id)
+        return None if pos is None else self.rows[pos]
+
+    def event_by_name(self, event_name):
+        pos = self.name_positions.get(normalize_name(event_name))
+        return None if pos is None else self.rows[pos]
+
+    def positions_on(self, date):
+        """Positions of the events on a date (a YYYY-MM-DD string or date)"""
+        try:
+            day = np.datetime64(str(date)[:10], 'D')
+        except ValueError:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.dates == day)
+
+
+class EventCatalog:
+    """Event lookups over a CatalogSnapshot held in self.catalog.
+
+    Subclasses set self.catalog and provide bookings_for_attendee,
+    registered_count and registered_counts. Those that set
+    tracks_changes call listeners with the EventID whose bookings
+    changed, or None after a full reload.
+    """
+
+    tracks_changes = False
+    catalog = None
+
+    @property
+    def events(self):
+        return self.catalog.events
+
+    @property
+    def event_dates(self):
+        return self.catalog.dates
+
+    @property
+    def event_capacity(self):
+        return self.catalog.capacity
+
+    def event_by_id(self, event_id):
+        """Event row dict for an EventID, or None"""
+        return self.catalog.event_by_id(event_id)
+
+    def event_position(self, event_id):
+        """Catalog position of an EventID (index into event_dates etc.), or None"""
+        return self.catalog.positions.get(event_id)
+
+    def event_by_name(self, event_name):
+        """Event row dict for a case-insensitive event name, or None"""
+        return self.catalog.event_by_name(event_name)
+
+    def find_event(self, event_name):
+        """One-row DataFrame slice for an event name (empty if unknown)"""
+        catalog = self.catalog
+        pos = catalog.name_positions.get(normalize_name(event_name))
+        if pos is None:
+            return catalog.events.iloc[0:0]
+        return catalog.events.iloc[[pos]]
+
+    def event_rows(self):
+        """Event row dicts in catalog order"""
+        return self.catalog.rows
+
+    def event_names(self):
+        return self.catalog.events['EventName'].tolist()
+
+    def events_for_attendee(self, attendee_id, status='Registered'):
+        """Event rows the attendee has bookings for, in booking order"""
+        catalog = self.catalog
+        result = []
+        for booking in self.bookings_for_attendee(attendee_id, status):
+            event = catalog.event_by_id(booking['EventID'])
+            if event is not None:
+                result.append(event)
+        return result
+
+    def seats_left(self, event_id):
+        """Capacity minus registered bookings, or None for an unknown event"""
+        catalog = self.catalog
+        pos = catalog.positions.get(event_id)
+        if pos is None:
+            return None
+        return int(catalog.capacity[pos]) - self.registered_count(event_id)
+
+    def seat_counts(self):
+        """(catalog, registered bookings per event as an array in its order)"""
+        catalog = self.catalog
+        counts = self.registered_counts()
+        return catalog, np.array([counts.get(event_id, 0) for event_id in catalog.events['EventID'].tolist()],
+                                 dtype=np.int64)
+
+    def event_positions_on(self, date):
+        """Catalog positions of the events on a date (a YYYY-MM-DD string or date)"""
+        return self.catalog.positions_on(date)
+
+
+class StoreState:
+    """One load of the three tables plus the indexes over them.
+
+    reload() builds a new one off to the side and swaps it in whole, so
+    readers never see a catalog from one load and bookings from another.
+    Journal entries are applied to the current one in place.
+    """
+
+    def __init__(self, catalog, attendees, bookings, sources):
+        self.catalog = catalog
+        self.sources = sources
+        self.attendees = FrameRows(attendees)
+        self.attendee_ids = IdAllocator('A')
+        self.booking_ids = IdAllocator('B')
+        ids = attendees['AttendeeID'].tolist()
+        emails = attendees['Email'].tolist()
+        # Reversed so the first attendee with an email wins, as in add_attendee
+        self.attendee_by_email = RowIndex(self.attendees, dict(zip(reversed(emails), range(len(emails) - 1, -1, -1))))
+        self.attendee_by_id = RowIndex(self.attendees, dict(zip(ids, range(len(ids)))))
+        self.attendee_ids.observe_all(ids)
+        # Events are coded first, in catalog order, so an event's code is
+        # its catalog position
+        event_ids = catalog.events['EventID'].tolist()
+        self.event_codes = Interner(event_ids)
+        self.attendee_codes = Interner(self.attendee_by_id)
+        self.booking_table = BookingTable(self.attendee_codes, self.event_codes)
+        self.booking_table.load(bookings)
+        self.catalog_codes = np.array([self.event_codes.get(event_id) for event_id in event_ids], dtype=np.int64)
+        self.booking_ids.observe_number(self.booking_table.max_number())
+        self.booking_ids.observe_all(self.booking_table.odd_ids())
+
+    def add_attendee(self, attendee):
+        pos = len(self.attendees)
+        self.attendees.append(attendee)
+        self.attendee_by_email.positions.setdefault(attendee['Email'], pos)
+        self.attendee_by_id.positions[attendee['AttendeeID']] = pos
+        self.attendee_ids.observe(attendee['AttendeeID'])
+        self.attendee_codes.code(attendee['AttendeeID'])
+
+
+class EventStore(EventCatalog):
+    """Events, attendees and bookings loaded once and kept in memory.
+
+    Events stay in a DataFrame because callers slice and display the
+    catalog. Attendees stay in theirs too, with hash indexes from ID and
+    email to row position; row dicts are built on access (FrameRows).
+    Bookings live in a BookingTable: int codes for the IDs and status in
+    numpy columns, with EventID codes shared with the catalog (see
+    booking_table.py), so lookups and counts are integer compares and a
+    booking costs a few bytes instead of a dict. All of it is held in one
+    StoreState that reload() replaces atomically.
+
+    Writes go to an append-only journal next to the CSVs instead of
+    rewriting them; compact() folds the journal back into the snapshot.
+    With snapshot_format="arrow" snapshots are Arrow files (see
+    columnar.py) that load memory-mapped; each table is read from
+    whichever of its .csv and .arrow files is newer, and a table loaded
+    from CSV is converted once so the next start is fast. Compaction
+    rewrites both files, so the CSV never falls behind.
+    snapshot_changed() tells whether the files differ from what was
+    loaded; SnapshotWatcher uses it to reload after outside edits.
+
+    Every write runs under a thread lock plus a file lock on the journal.
+    Inside that critical section the store first applies entries other
+    processes appended since its last write, so capacity checks and ID
+    allocation always see every committed booking.
+    """
+
+    tracks_changes = True
+
+    def __init__(self, csv_path, snapshot_format='csv'):
+        if snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Unknown snapshot format {snapshot_format!r}; expected one of {SNAPSHOT_FORMATS}")
+        self.csv_path = csv_path
+        self.snapshot_format = snapshot_format
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self._file('Bookings.journal.lock'))
+        self._compact_lock = FileLock(self._file('Bookings.compact.lock'))
+        self._write_depth = 0
+        self._compactor = None
+        self._listeners = []
+        self._loads = 0
+        self.version = 0
+        self.journal = BookingJournal(self._file('Bookings.journal'))
+        self.reload()
+
+    def _file(self, name):
+        return os.path.join(self.csv_path, name)
+
+    @property
+    def catalog(self):
+        return self._state.catalog
+
+    @property
+    def booking_table(self):
+        return self._state.booking_table
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the thread and file locks, synced with the journal tail"""
+        with self._lock:
+            if self._write_depth == 0:
+                self._file_lock.acquire()
+                try:
+                    self._sync()
+                except Exception:
+                    self._file_lock.release()
+                    raise
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self._file_lock.release()
+
+    def _sync(self):
+        """Apply journal entries written by other processes"""
+        if self.journal.rotated():
+            # Another process compacted; its new journal only holds entries
+            # we may not have seen, and replaying the rest is harmless.
+            self.journal.reopen()
+            self._journal_offset = 0
+            self._journal_entries = 0
+        for entry, offset in self.journal.replay(self._journal_offset):
+            self._apply(entry)
+            self._journal_offset = offset
+            self._journal_entries += 1
+
+    # ----------------- Loading -----------------
+    def reload(self):
+        """Read all three snapshots, replay the journal and swap the result in.
+
+        The files are read without holding the write locks, so writers
+        keep going during a long load. If a compaction replaced the
+        journal meanwhile, the snapshots read may predate entries it
+        folded, so the load is retried.
+        """
+        while True:
+            journal_id = self.journal.file_id()
+            state = self._load()
+            with self._lock, self._file_lock:
+                if self.journal.file_id() != journal_id:
+                    continue
+                if self.journal.rotated():
+                    self.journal.reopen()
+                offset = entries = 0
+                for entry, offset in self.journal.replay():
+                    self._apply(entry, state)
+                    entries += 1
+                self._state = state
+                self._journal_offset = offset
+                self._journal_entries = entries
+                self.version += 1
+                break
+        self._notify(None)
+
+    def _load(self):
+        with telemetry.span("store.read_snapshot", path=self.csv_path) as span:
+            sources = {}
+            events = self._read_snapshot('Events', sources)
+            attendees = self._read_snapshot('Attendee', sources)
+            bookings = self._read_snapshot('Bookings', sources)
+            span.set(rows=len(events) + len(attendees) + len(bookings))
+        self._loads += 1
+        return StoreState(CatalogSnapshot(events, self._loads), attendees, bookings, sources)
+
+    def _snapshot_is_arrow(self, name):
+        """Whether the Arrow file of a table exists and is at least as new as its CSV"""
+        try:
+            arrow = os.stat(self._file(name + '.arrow')).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        try:
+            return arrow >= os.stat(self._file(name + '.csv')).st_mtime_ns
+        except FileNotFoundError:
+            return True
+
+    def _source(self, name):
+        """(path, mtime, size) of the file a table would be read from now"""
+        path = self._file(name + ('.arrow' if self._snapshot_is_arrow(name) else '.csv'))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return path, None, None
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def _read_snapshot(self, name, sources):
+        """A table as a DataFrame; records its source file"""
+        sources[name] = self._source(name)
+        if self._snapshot_is_arrow(name):
+            import columnar
+            return columnar.to_frame(columnar.read_table(self._file(name + '.arrow')))
+        df = pd.read_csv(self._file(name + '.csv'), dtype=CSV_DTYPES.get(name))
+        if self.snapshot_format == 'arrow':
+            self._write_snapshot(df, name)
+            sources[name] = self._source(name)
+        return df
+
+    def _write_snapshot(self, df, name):
+        if self.snapshot_format == 'arrow':
+            import columnar
+            with telemetry.span("store.write_snapshot", file=name + '.arrow', rows=len(df)):
+                columnar.write_table(df, self._file(name + '.arrow'), name)
+        else:
+            self._write_csv(df, name + '.csv')
+
+    def snapshot_changed(self):
+        """Whether any snapshot file differs from the one last loaded or written.
+
+        Files a compaction (in any process) wrote are not changes: they
+        hold the journal this store already replays.
+        """
+        sources = self._state.sources
+        compacted = None
+        changed = False
+        for name, source in list(sources.items()):
+            current = self._source(name)
+            if current == source:
+                continue
+            if compacted is None:
+                compacted = self._compacted()
+            if compacted.get(name) == [os.path.basename(current[0]), current[1], current[2]]:
+                sources[name] = current
+            else:
+                changed = True
+        return changed
+
+    def compacting(self):
+        """Whether this or another process is compacting right now"""
+        probe = FileLock(self._compact_lock.path)
+        if not probe.acquire(blocking=False):
+            return True
+        probe.release()
+        return False
+
+    def _compacted(self):
+        """{table: [file name, mtime, size]} of the snapshots the last compaction wrote"""
+        try:
+            with open(self._file('Bookings.compacted'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # ----------------- Lookups -----------------
+    def attendee_by_email(self, email):
+        """Attendee row dict for an email, or None"""
+        return self._state.attendee_by_email.get(email)
+
+    def bookings_for_attendee(self, attendee_id, status=None):
+        """Bookings of one attendee, optionally filtered by status"""
+        table = self._state.booking_table
+        return table.bookings(table.rows_for_attendee(attendee_id, status))
+
+    def bookings_for_event(self, event_id, status=None):
+        """Bookings of one event, optionally filtered by status"""
+        table = self._state.booking_table
+        return table.bookings(table.rows_for_event(event_id, status))
+
+    def events_for_attendee(self, attendee_id, status='Registered'):
+        """Event rows the attendee has bookings for, in booking order"""
+        state = self._state
+        table = state.booking_table
+        codes = table.event[table.rows_for_attendee(attendee_id, status)]
+        result = []
+        for event_id in (state.event_codes.values[code] for code in codes.tolist()):
+            event = state.catalog.event_by_id(event_id)
+            if event is not None:
+                result.append(event)
+        return result
+
+    def registered_count(self, event_id):
+        """Number of Registered bookings for an event"""
+        return self._state.booking_table.registered_count(event_id)
+
+    def registered_counts(self):
+        """Registered bookings per EventID"""
+        state = self._state
+        registered = state.booking_table.registered
+        return {state.event_codes.values[code]: int(registered[code]) for code in np.flatnonzero(registered)}
+
+    def seat_counts(self):
+        """(catalog, registered bookings per event as an array in its order)"""
+        state = self._state
+        registered = state.booking_table.registered
+        counts = np.zeros(len(state.catalog_codes), dtype=np.int64)
+        known = state.catalog_codes < len(registered)
+        counts[known] = registered[state.catalog_codes[known]]
+        return state.catalog, counts
+
+    def find_booking(self, attendee_id, event_id, status=None):
+        """First booking of an attendee for an event, or None"""
+        state = self._state
+        table = state.booking_table
+        code = state.event_codes.get(event_id)
+        if code is None:
+            return None
+        rows = table.rows_for_attendee(attendee_id, status)
+        rows = rows[table.event[rows] == code]
+        return table.booking(int(rows[0])) if len(rows) else None
+
+    # ----------------- Writes -----------------
+    def add_attendee(self, name, email):
+        """Return the attendee for an email, creating and journaling it if new"""
+        with self._exclusive():
+            state = self._state
+            existing = state.attendee_by_email.get(email)
+            if existing is not None:
+                return existing
+            entry = {'op': 'attendee', 'AttendeeID': state.attendee_ids.next(), 'Name': name, 'Email': email}
+            self._commit(entry)
+            return state.attendee_by_id[entry['AttendeeID']]
+
+    def add_booking(self, attendee_id, event_id):
+        """Create a Registered booking without a capacity check and journal it"""
+        with self._exclusive():
+            table = self._state.booking_table
+            entry = {
+                'op': 'book',
+                'BookingID': self._state.booking_ids.next(),
+                'AttendeeID': attendee_id,
+                'EventID': event_id
+            }
+            self._commit(entry)
+            return table.booking(table.row_of(entry['BookingID']))
+
+    def reserve_seat(self, attendee_id, event_id):
+        """Check for a duplicate and a free seat, then book, atomically.
+
+        Returns (status, booking) where status is 'booked', 'duplicate'
+        or 'full'.
+        """
+        with self._exclusive():
+            existing = self.find_booking(attendee_id, event_id, 'Registered')
+            if existing is not None:
+                return 'duplicate', existing
+            if self.seats_left(event_id) <= 0:
+                return 'full', None
+            return 'booked', self.add_booking(attendee_id, event_id)
+
+    def set_booking_status(self, booking, status):
+        """Change a booking's status and journal it"""
+        with self._exclusive():
+            self._commit({'op': 'status', 'BookingID': booking['BookingID'], 'Status': status})
+        booking['Status'] = status
+
+    def _commit(self, entry):
+        with telemetry.span("store.journal_append", op=entry['op']):
+            self._journal_offset = self.journal.append(entry)
+        self._apply(entry)
+        self._journal_entries += 1
+
+    def _apply(self, entry, state=None):
+        """Apply one journal entry to the tables (idempotent for replays).
+
+        Every change bumps self.version, which caches key on. Listeners
+        hear about changes to the live state only; reload() notifies once
+        when it swaps a new one in.
+        """
+        live = state is None
+        state = self._state if live else state
+        table = state.booking_table
+        op = entry['op']
+        if op == 'attendee':
+            if entry['AttendeeID'] in state.attendee_by_id:
+                return
+            state.add_attendee({'AttendeeID': entry['AttendeeID'], 'Name': entry['Name'], 'Email': entry['Email']})
+            self.version += 1
+        elif op == 'book':
+            if table.row_of(entry['BookingID']) is not None:
+                return
+            table.append(entry['BookingID'], entry['AttendeeID'], entry['EventID'])
+            state.booking_ids.observe(entry['BookingID'])
+            self.version += 1
+            if live:
+                self._notify(entry['EventID'])
+        elif op == 'status':
+            row = table.row_of(entry['BookingID'])
+            if row is None:
+                return
+            table.set_status(row, entry['Status'])
+            self.version += 1
+            if live:
+                self._notify(state.event_codes.values[table.event[row]])
+
+    # ----------------- Change listeners -----------------
+    def add_listener(self, callback):
+        """Call callback(event_id) after each booking change, None after reload"""
+        self._listeners.append(callback)
+
+    def _notify(self, event_id):
+        for callback in self._listeners:
+            callback(event_id)
+
+    # ----------------- Compaction -----------------
+    def compact(self):
+        """Fold the journal into fresh Attendee and Bookings snapshots.
+
+        Rows are copied under the write locks, but the CSVs are written
+        outside them so registrations keep going; entries journaled
+        meanwhile are kept. Only one process compacts at a time.
+        """
+        if not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            with self._exclusive():
+                if self._journal_entries == 0:
+                    return
+                state = self._state
+                offset = self._journal_offset
+                attendees = state.attendees.to_frame().reindex(columns=ATTENDEE_COLUMNS)
+                bookings = state.booking_table.frame()
+                folded = self._journal_entries
+            written = {}
+            for name, df in (('Attendee', attendees), ('Bookings', bookings)):
+                if self.snapshot_format == 'arrow':
+                    # Keep the CSV current too, written first so the Arrow
+                    # file stays the newer one. A stale CSV would win the
+                    # next load as soon as anything touched it.
+                    self._write_csv(df, name + '.csv')
+                self._write_snapshot(df, name)
+                # Our own rewrite, not an outside edit to reload for. A
+                # reload may have swapped states meanwhile, so stamp the live one.
+                with self._exclusive():
+                    written[name] = self._state.sources[name] = self._source(name)
+            # Lets other processes' watchers tell these files from outside edits
+            self._write_compacted({name: [os.path.basename(path), mtime, size]
+                                   for name, (path, mtime, size) in written.items()})
+            with self._exclusive():
+                self.journal.discard_until(offset)
+                self._journal_offset -= offset
+                self._journal_entries -= folded
+        finally:
+            self._compact_lock.release()
+
+    def _write_compacted(self, sources):
+        tmp_path = self._file(f"Bookings.compacted.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(sources, f)
+        os.replace(tmp_path, self._file('Bookings.compacted'))
+
+    def _write_csv(self, df, name):
+        tmp_path = self._file(f"{name}.{os.getpid()}.tmp")
+        with telemetry.span("store.write_snapshot", file=name, rows=len(df)):
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                df.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._file(name))
+
+    def start_compaction(self, interval=60, min_entries=500):
+        """Compact in a daemon thread whenever the journal grows past min_entries"""
+        if self._compactor is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                if self._journal_entries >= min_entries:
+                    try:
+                        self.compact()
+                    except OSError as e:
+                        log.warning("Journal compaction failed: %s", e)
+
+        self._compactor = threading.Thread(target=run, name='journal-compaction', daemon=True)
+        self._compactor.start()
+
+    # ----------------- Export -----------------
+    def attendees_frame(self):
+        """Current attendees as a DataFrame"""
+        with self._lock:
+            return self._state.attendees.to_frame().reindex(columns=ATTENDEE_COLUMNS)
+
+    def bookings_frame(self):
+        """Current bookings as a DataFrame"""
+        with self._lock:
+            return self._state.booking_table.frame()
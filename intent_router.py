@@ -0,0 +1,101 @@
+import re
+from datetime import datetime, timedelta
+
+# Trailing "(Name: ..., Email: ...)" that app.py appends to every prompt
+USER_INFO_SUFFIX = re.compile(r'\s*\((?:Name|Email):[^()]*\)\s*$', re.IGNORECASE)
+
+# Fixed phrasings, mostly the templates app.py sends. Checked in order.
+FIXED_INTENTS = [
+    (r'(?:recommend|suggest) (?:some )?events?(?: for me)?', 'recommend'),
+    (r'auto[- ]?book (?:my )?priority events?(?: for me)?', 'auto_book'),
+    (r"(?:check if i'?m overbooking|am i overbooking|check (?:my )?overbooking(?: risk)?)", 'overbooking_check'),
+    (r'(?:show|list|view) (?:all )?my bookings', 'my_bookings'),
+    (r'my bookings', 'my_bookings'),
+    (r'(?:show )?(?:the )?seat optimi[sz]ation report', 'seat_report'),
+    (r'cluster (?:the )?events(?: by category)?', 'cluster'),
+    (r'(?:show|view) (?:my )?notification schedule', 'notifications'),
+    (r'check my schedule(?: for conflicts)?', 'schedule_check'),
+    (r'(?:show|list|what are the|what) (?:all )?(?:available )?events(?: are there)?', 'show_events'),
+]
+FIXED_INTENTS = [(re.compile(pattern, re.IGNORECASE), intent) for pattern, intent in FIXED_INTENTS]
+
+# Phrasings that carry one event name
+EVENT_INTENTS = [
+    (r'predict (?:the )?attendance (?:for|of) (?P<event>.+)', 'forecast'),
+    (r'(?:please )?(?:register|sign) me (?:up )?(?:for|to) (?P<event>.+)', 'register'),
+    (r'(?:please )?cancel (?:my )?(?:booking|registration)? ?(?:for )?(?P<event>.+)', 'cancel'),
+    (r'(?:how many )?seats (?:are )?(?:left|available|remaining) (?:for|in|at) (?P<event>.+)', 'seats_left'),
+    (r'(?:check )?availability (?:for|of) (?P<event>.+)', 'seats_left'),
+]
+EVENT_INTENTS = [(re.compile(pattern, re.IGNORECASE), intent) for pattern, intent in EVENT_INTENTS]
+
+COMPARE = re.compile(r'compare (?P<events>.+)', re.IGNORECASE)
+COMPARE_SEPARATOR = re.compile(r' (?:and|with|vs\.?|versus) ', re.IGNORECASE)
+EVENTS_ON_DATE = re.compile(r'(?:show |list )?events (?:on|for) (?P<date>\d{4}-\d{2}-\d{2})', re.IGNORECASE)
+RELATIVE_DATES = {
+    'today': 0,
+    'tomorrow': 1,
+    'this week': 3,
+    'next week': 7,
+}
+EVENTS_AROUND = re.compile(
+    r'(?:what )?events (?:are )?(?:happening )?(?P<when>today|tomorrow|this week|next week)', re.IGNORECASE
+)
+
+
+def strip_user_info(prompt):
+    """Remove the "(Name: ..., Email: ...)" suffix app.py appends"""
+    return USER_INFO_SUFFIX.sub('', prompt or '').strip()
+
+
+def _clean(text):
+    return text.strip().rstrip('?.!').strip()
+
+
+def route_intent(prompt, resolve_event, today=None):
+    """Map a known phrasing to an intent dict without calling the model.
+
+    Returns the same shape as the LLM classifier ({"intent": ...,
+    "event": ..., ...}) or None when the prompt needs the model.
+    resolve_event(name) must return the canonical event name or None;
+    event-specific intents only take the fast path when every event
+    named resolves, so vague references still go to the model.
+    """
+    text = _clean(strip_user_info(prompt))
+    if not text:
+        return None
+
+    for pattern, intent in FIXED_INTENTS:
+        if pattern.fullmatch(text):
+            return {"intent": intent}
+
+    match = EVENTS_ON_DATE.fullmatch(text)
+    if match:
+        return {"intent": "show_events", "date": match.group('date')}
+
+    match = EVENTS_AROUND.fullmatch(text)
+    if match:
+        today = today or datetime.now()
+        target = today + timedelta(days=RELATIVE_DATES[match.group('when').lower()])
+        return {"intent": "suggest_by_date", "date": target.strftime('%Y-%m-%d')}
+
+    match = COMPARE.fullmatch(text)
+    if match:
+        # Event names may themselves contain "and", so try every split
+        events = match.group('events')
+        for sep in COMPARE_SEPARATOR.finditer(events):
+            event1 = resolve_event(_clean(events[:sep.start()]))
+            event2 = resolve_event(_clean(events[sep.end():]))
+            if event1 and event2:
+                return {"intent": "compare", "event": event1, "event2": event2}
+        return None
+
+    for pattern, intent in EVENT_INTENTS:
+        match = pattern.fullmatch(text)
+        if match:
+            event = resolve_event(_clean(match.group('event')))
+            if event:
+                return {"intent": intent, "event": event}
+            return None
+
+    return None
@@ -0,0 +1,315 @@
+import abc
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+import typing
+from llm_cache import ResponseCache
+
+
+class LLMBackend(abc.ABC):
+    """Where model calls go. Subclasses implement generate().
+
+    schema is a llm_schemas model the reply must match (None for free
+    text) and timeout the seconds the call may take. stream() and
+    generate_async() default to wrapping generate().
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    def generate(self, model, prompt, schema=None, timeout=None):
+        """The model's reply to prompt, as text"""
+
+    def stream(self, model, prompt, schema=None, timeout=None):
+        yield self.generate(model, prompt, schema, timeout)
+
+    async def generate_async(self, model, prompt, schema=None, timeout=None):
+        return await asyncio.to_thread(self.generate, model, prompt, schema, timeout)
+
+
+# ----------------- Gemini -----------------
+class GeminiBackend(LLMBackend):
+    """Google GenAI client; schemas become JSON-mode response schemas"""
+
+    name = "gemini"
+
+    def __init__(self, api_key):
+        from google import genai
+        from google.genai import types
+        self._types = types
+        self.client = genai.Client(api_key=api_key)
+
+    def _config(self, schema, timeout):
+        config = {}
+        if schema is not None:
+            config['response_mime_type'] = "application/json"
+            config['response_schema'] = schema
+        if timeout is not None:
+            config['http_options'] = self._types.HttpOptions(timeout=max(1, int(timeout * 1000)))
+        return self._types.GenerateContentConfig(**config) if config else None
+
+    def generate(self, model, prompt, schema=None, timeout=None):
+        response = self.client.models.generate_content(
+            model=model, contents=prompt, config=self._config(schema, timeout)
+        )
+        return response.text
+
+    def stream(self, model, prompt, schema=None, timeout=None):
+        for chunk in self.client.models.generate_content_stream(
+            model=model, contents=prompt, config=self._config(schema, timeout)
+        ):
+            if chunk.text:
+                yield chunk.text
+
+    async def generate_async(self, model, prompt, schema=None, timeout=None):
+        response = await self.client.aio.models.generate_content(
+            model=model, contents=prompt, config=self._config(schema, timeout)
+        )
+        return response.text
+
+
+# ----------------- Rule-based stub -----------------
+STUB_INTENTS = [
+    (r'\brecommend|\bsuggest', 'recommend'),
+    (r'\bcompare\b', 'compare'),
+    (r'\bconflict|\bschedule\b', 'schedule_check'),
+    (r'\bnext week|\btomorrow|\bthis week', 'suggest_by_date'),
+    (r'\bcancel', 'cancel'),
+    (r'\bregister|\bsign me up|\bbook me', 'register'),
+    (r'\bseats?\b|\bavailab', 'seats_left'),
+    (r'\bmy bookings|\bmy events', 'my_bookings'),
+    (r'\bforecast|\bpredict', 'forecast'),
+    (r'\bcategor|\bcluster|\bgroup', 'cluster'),
+    (r'\bevents\b', 'show_events'),
+]
+STUB_INTENTS = [(re.compile(pattern, re.IGNORECASE), intent) for pattern, intent in STUB_INTENTS]
+
+
+def _placeholder(annotation):
+    """Smallest valid value for a schema field type"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Literal:
+        return typing.get_args(annotation)[0]
+    if origin is typing.Union:
+        return None
+    if origin is list:
+        return [_placeholder(typing.get_args(annotation)[0])]
+    if hasattr(annotation, 'model_fields'):
+        return {name: _placeholder(field.annotation) for name, field in annotation.model_fields.items()}
+    return {str: "stub", int: 0, float: 0.0, bool: False}.get(annotation)
+
+
+class StubBackend(LLMBackend):
+    """Deterministic answers derived from the prompt text.
+
+    Replies always validate against the requested schema, so every code
+    path downstream of the model runs; the content is only plausible.
+    Replies are instant unless latency (seconds, plus up to jitter at
+    random) is set to imitate a real model.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency=0.0, jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+
+    def _delay(self, timeout):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if timeout is not None and delay > timeout:
+            return timeout, TimeoutError(f"stub latency {delay:.2f}s exceeds {timeout:.2f}s")
+        return delay, None
+
+    def generate(self, model, prompt, schema=None, timeout=None):
+        delay, error = self._delay(timeout)
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+        return self._reply(prompt, schema)
+
+    async def generate_async(self, model, prompt, schema=None, timeout=None):
+        delay, error = self._delay(timeout)
+        if delay:
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return self._reply(prompt, schema)
+
+    def _reply(self, prompt, schema):
+        if schema is None:
+            return f"Stub reply to a {len(prompt)}-character prompt."
+        value = _placeholder(schema)
+        rule = getattr(self, '_' + schema.__name__.lower(), None)
+        if rule is not None:
+            value.update(rule(prompt))
+        return json.dumps(value)
+
+    def _intentchoice(self, prompt):
+        query = prompt.rsplit("User Query:", 1)[-1]
+        # Event names the query mentions, from the "- Name: date ..." context lines
+        listed = re.findall(r'^- (.+?): \d{4}-\d{2}-\d{2}', prompt, re.MULTILINE)
+        mentioned = [name for name in listed if name.lower() in query.lower()]
+        for pattern, intent in STUB_INTENTS:
+            if pattern.search(query):
+                return {'intent': intent, 'event': (mentioned[:1] or [None])[0],
+                        'event2': (mentioned[1:2] or [None])[0]}
+        return {'intent': 'conversational', 'response': "Stub conversational reply."}
+
+    def _recommendations(self, prompt):
+        names = re.findall(r'"name": "([^"]+)"', prompt)[:2]
+        return {'recommendations': [{'event_name': name, 'reason': "Stub pick."} for name in names]}
+
+    def _suggestions(self, prompt):
+        events = re.findall(r'"EventName": "([^"]+)", "Date": "([^"]+)"', prompt)[:3]
+        return {'suggestions': [{'event_name': name, 'date': date, 'reason': "Stub pick."} for name, date in events]}
+
+    def _forecast(self, prompt):
+        match = re.search(r'Current bookings: (\d+)/(\d+)', prompt)
+        if match is None or int(match.group(2)) == 0:
+            return {}
+        return {'predicted_attendance_pct': round(int(match.group(1)) / int(match.group(2)) * 100)}
+
+    def _clusters(self, prompt):
+        names = re.findall(r"'EventName': '([^']+)'", prompt)
+        return {'clusters': [{'category': "Events", 'events': names}]}
+
+
+# ----------------- Record / replay -----------------
+class ReplayBackend(LLMBackend):
+    """Serve responses captured in a JSONL file, with synthetic latency.
+
+    With record=True every call goes to the inner backend and the reply,
+    its chunks and its latency are appended to the file; otherwise calls
+    are answered from the file. latency=None replays each recording's
+    own latency, a number uses that fixed delay (0 for full speed), and
+    jitter adds up to that many seconds at random. Prompts without a
+    recording go to fallback, or raise KeyError if there is none.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, inner=None, record=False, latency=None, jitter=0.0, fallback=None):
+        self.path = path
+        self.inner = inner
+        self.record = record
+        self.latency = latency
+        self.jitter = jitter
+        self.fallback = fallback
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._recordings = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._recordings[entry['key']] = entry
+
+    @staticmethod
+    def key(model, prompt, schema):
+        return ResponseCache.make_key(model if schema is None else f"{model}/{schema.__name__}", prompt, "")
+
+    def _save(self, key, model, prompt, schema, chunks, latency):
+        entry = {
+            'key': key,
+            'model': model,
+            'schema': schema.__name__ if schema is not None else None,
+            'prompt': prompt[:200],
+            'chunks': chunks,
+            'latency': round(latency, 4),
+        }
+        with self._lock:
+            self._recordings[key] = entry
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _lookup(self, model, prompt, schema):
+        entry = self._recordings.get(self.key(model, prompt, schema))
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            if self.fallback is None:
+                raise KeyError(f"no recording for prompt: {prompt[:80]!r}")
+        return entry
+
+    def _delay(self, entry, timeout):
+        """Synthetic latency; raises TimeoutError if it exceeds timeout"""
+        delay = entry['latency'] if self.latency is None else self.latency
+        delay += random.uniform(0, self.jitter) if self.jitter else 0
+        if timeout is not None and delay > timeout:
+            return timeout, TimeoutError(f"replayed latency {delay:.2f}s exceeds {timeout:.2f}s")
+        return delay, None
+
+    def generate(self, model, prompt, schema=None, timeout=None):
+        if self.record:
+            start = time.monotonic()
+            text = self.inner.generate(model, prompt, schema, timeout)
+            self._save(self.key(model, prompt, schema), model, prompt, schema, [text], time.monotonic() - start)
+            return text
+        entry = self._lookup(model, prompt, schema)
+        if entry is None:
+            return self.fallback.generate(model, prompt, schema, timeout)
+        delay, error = self._delay(entry, timeout)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return "".join(entry['chunks'])
+
+    def stream(self, model, prompt, schema=None, timeout=None):
+        if self.record:
+            start = time.monotonic()
+            chunks = []
+            for chunk in self.inner.stream(model, prompt, schema, timeout):
+                chunks.append(chunk)
+                yield chunk
+            self._save(self.key(model, prompt, schema), model, prompt, schema, chunks, time.monotonic() - start)
+            return
+        entry = self._lookup(model, prompt, schema)
+        if entry is None:
+            yield from self.fallback.stream(model, prompt, schema, timeout)
+            return
+        delay, error = self._delay(entry, timeout)
+        if error is not None:
+            time.sleep(delay)
+            raise error
+        # Spread the delay over the chunks as they were recorded
+        for chunk in entry['chunks']:
+            time.sleep(delay / max(1, len(entry['chunks'])))
+            yield chunk
+
+    async def generate_async(self, model, prompt, schema=None, timeout=None):
+        if self.record:
+            start = time.monotonic()
+            text = await self.inner.generate_async(model, prompt, schema, timeout)
+            self._save(self.key(model, prompt, schema), model, prompt, schema, [text], time.monotonic() - start)
+            return text
+        entry = self._lookup(model, prompt, schema)
+        if entry is None:
+            return await self.fallback.generate_async(model, prompt, schema, timeout)
+        delay, error = self._delay(entry, timeout)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return "".join(entry['chunks'])
+
+
+def make_backend(name, api_key=None, recordings="llm_recordings.jsonl", latency=None, jitter=0.0):
+    """Backend by name: gemini, stub, record (gemini, saved to recordings)
+    or replay (from recordings, unknown prompts answered by the stub).
+
+    latency and jitter set the synthetic delay of stub and replay.
+    """
+    if name == "gemini":
+        return GeminiBackend(api_key)
+    if name == "stub":
+        return StubBackend(latency or 0.0, jitter)
+    if name == "record":
+        return ReplayBackend(recordings, inner=GeminiBackend(api_key), record=True)
+    if name == "replay":
+        return ReplayBackend(recordings, latency=latency, jitter=jitter, fallback=StubBackend())
+    raise ValueError(f"Unknown LLM backend: {name}")
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import telemetry
+from telemetry import log
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace and case so trivially different prompts share a key"""
+    return " ".join(str(prompt).split()).casefold()
+
+
+class ResponseCache:
+    """LRU cache of model responses with a per-entry TTL.
+
+    Keys combine the model name, the normalized prompt and a data version,
+    so any change to events or bookings makes old answers unreachable
+    instead of stale. With disk_dir set, entries are also written there as
+    JSON files and survive restarts and are shared between processes.
+    """
+
+    def __init__(self, max_entries=256, ttl=900, disk_dir=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(model, prompt, version):
+        raw = f"{model}\x00{version}\x00{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Cached value for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    telemetry.metrics.inc('llm_cache_requests_total', result='hit', tier='memory')
+                    return value
+                del self._entries[key]
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is None:
+            telemetry.metrics.inc('llm_cache_requests_total', result='miss', tier='none')
+        else:
+            telemetry.metrics.inc('llm_cache_requests_total', result='hit', tier='disk')
+        return value
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._store(key, expires, value)
+        self._disk_set(key, expires, value)
+
+    def _store(self, key, expires, value):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ----------------- Disk tier -----------------
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key + ".json")
+
+    def _disk_get(self, key, now):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry['expires'] <= now:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        with self._lock:
+            self._store(key, entry['expires'], entry['value'])
+        return entry['value']
+
+    def _disk_set(self, key, expires, value):
+        if not self.disk_dir:
+            return
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'expires': expires, 'value': value}, f)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError) as e:
+            log.warning("Response cache write failed: %s", e)
@@ -0,0 +1,272 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import telemetry
+from telemetry import estimate_tokens, log
+
+# Absolute (time.monotonic) deadline shared by every call in a budget block
+_budget_deadline = contextvars.ContextVar('llm_budget_deadline', default=None)
+
+
+class LLMUnavailable(Exception):
+    """No usable model reply before the deadline, or retries ran out"""
+
+
+def retryable(error):
+    """Whether a failed call is worth repeating (timeouts, 5xx, rate limits)"""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int) and 400 <= code < 500:
+        return code in (408, 429)
+    return True
+
+
+class LLMClient:
+    """Wrapper around an LLM backend that bounds how long any call can take.
+
+    Every call gets a deadline: its own timeout, tightened by the
+    enclosing budget() block if there is one. Failed attempts are retried
+    with full-jitter exponential backoff while time remains. With
+    hedge=True a duplicate request is sent if the first has not answered
+    by the p95 of recent latencies (hedge_after until enough samples
+    exist), and whichever returns first wins. Running out of time raises
+    LLMUnavailable so callers can fall back to a local answer.
+
+    Unhedged sync calls run in the caller's thread and rely on the
+    backend's timeout. Hedged ones race in a pool of max_workers threads
+    against the same deadline, queueing included: the duplicate is only
+    sent once the first call has a worker, and calls still queued when
+    the deadline passes are cancelled.
+    """
+
+    def __init__(self, backend, model, timeout=20, retries=2, backoff=0.5, hedge_after=3.0, max_workers=32):
+        self.backend = backend
+        self.model = model
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.hedges = 0
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+        # Hedged sync calls race here so the caller can stop waiting at the deadline
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+
+    @contextmanager
+    def budget(self, seconds):
+        """Cap the total time of all model calls made inside the block.
+
+        Nested budgets keep whichever deadline is earlier.
+        """
+        deadline = time.monotonic() + seconds
+        current = _budget_deadline.get()
+        token = _budget_deadline.set(deadline if current is None else min(current, deadline))
+        try:
+            yield
+        finally:
+            _budget_deadline.reset(token)
+
+    def _deadline(self):
+        deadline = time.monotonic() + self.timeout
+        budget = _budget_deadline.get()
+        return deadline if budget is None else min(deadline, budget)
+
+    @staticmethod
+    def _remaining(deadline):
+        return max(0.001, deadline - time.monotonic())
+
+    # ----------------- Latency tracking -----------------
+    def _record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self):
+        """Seconds to wait before sending a hedged duplicate request"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < 20:
+            return self.hedge_after
+        return samples[int(len(samples) * 0.95) - 1]
+
+    def _hedged(self):
+        self.hedges += 1
+        telemetry.metrics.inc('llm_hedges_total', model=self.model)
+
+    def _span(self, kind, prompt, schema, **attrs):
+        return telemetry.span(f"llm.{kind}", model=self.model,
+                              schema=schema.__name__ if schema is not None else "text",
+                              prompt_tokens=estimate_tokens(prompt), **attrs)
+
+    def _count(self, span, text):
+        """Record token counts of a finished call on its span and in metrics"""
+        span.set(response_tokens=estimate_tokens(text))
+        labels = {'model': self.model, 'schema': span.attrs['schema']}
+        telemetry.metrics.inc('llm_calls_total', **labels)
+        telemetry.metrics.inc('llm_prompt_tokens_total', span.attrs['prompt_tokens'], **labels)
+        telemetry.metrics.inc('llm_response_tokens_total', span.attrs['response_tokens'], **labels)
+
+    def _backoff(self, attempt, error, deadline):
+        if attempt > self.retries or not retryable(error):
+            raise LLMUnavailable(str(error)) from error
+        delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+        if time.monotonic() + delay >= deadline:
+            raise LLMUnavailable(f"no time left to retry: {error}") from error
+        log.info("LLM call failed (%s); retry %d in %.2fs", error, attempt, delay)
+        telemetry.metrics.inc('llm_retries_total', model=self.model)
+        return delay
+
+    # ----------------- Sync -----------------
+    def _call(self, prompt, schema, deadline):
+        return self.backend.generate(self.model, prompt, schema, self._remaining(deadline))
+
+    def _submit(self, prompt, schema, deadline):
+        """Run a call in the pool with the time left when a worker picks it
+        up; future.started holds that moment"""
+        started = []
+
+        def run():
+            started.append(time.monotonic())
+            if started[0] >= deadline:
+                raise LLMUnavailable("deadline passed while queued")
+            return self._call(prompt, schema, deadline)
+
+        future = self._pool.submit(run)
+        future.started = started
+        return future
+
+    def _attempt(self, prompt, schema, deadline, hedge):
+        start = time.monotonic()
+        delay = self.hedge_delay() if hedge else None
+        if delay is None or start + delay >= deadline:
+            # Nothing to race
+            text = self._call(prompt, schema, deadline)
+            self._record(time.monotonic() - start)
+            return text
+        first = self._submit(prompt, schema, deadline)
+        pending = {first}
+        try:
+            done, _ = wait(pending, timeout=delay)
+            # Still queued means the pool is busy, not the model slow; don't add to it
+            if not done and first.started:
+                self._hedged()
+                pending.add(self._submit(prompt, schema, deadline))
+            error = None
+            while pending:
+                done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    raise LLMUnavailable(f"no reply within {time.monotonic() - start:.1f}s")
+                for future in done:
+                    if future.exception() is None:
+                        self._record(time.monotonic() - future.started[0])
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            # Calls that never got a worker are dropped; running ones end at their timeout
+            for future in pending:
+                future.cancel()
+
+    def generate(self, prompt, schema=None, hedge=False):
+        """Response text for prompt, or LLMUnavailable once the deadline passes"""
+        with self._span("generate", prompt, schema, hedge=hedge) as span:
+            text = self._generate(prompt, schema, hedge)
+            self._count(span, text)
+            return text
+
+    def _generate(self, prompt, schema, hedge):
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            if time.monotonic() >= deadline:
+                raise LLMUnavailable("deadline exceeded")
+            try:
+                return self._attempt(prompt, schema, deadline, hedge)
+            except LLMUnavailable:
+                raise
+            except Exception as e:
+                attempt += 1
+                time.sleep(self._backoff(attempt, e, deadline))
+
+    def stream(self, prompt, schema=None):
+        """Yield response text chunks; the backend timeout covers the whole stream.
+
+        Only failures before the first chunk are retried.
+        """
+        with self._span("stream", prompt, schema) as span:
+            parts = []
+            for chunk in self._stream(prompt, schema):
+                parts.append(chunk)
+                yield chunk
+            self._count(span, "".join(parts))
+
+    def _stream(self, prompt, schema):
+        deadline = self._deadline()
+        attempt = 0
+        started = False
+        while True:
+            try:
+                for chunk in self.backend.stream(self.model, prompt, schema, self._remaining(deadline)):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                attempt += 1
+                if started:
+                    raise LLMUnavailable(str(e)) from e
+                time.sleep(self._backoff(attempt, e, deadline))
+
+    # ----------------- Async -----------------
+    async def _call_async(self, prompt, schema, deadline):
+        return await self.backend.generate_async(self.model, prompt, schema, self._remaining(deadline))
+
+    async def _attempt_async(self, prompt, schema, deadline, hedge):
+        start = time.monotonic()
+        pending = {asyncio.ensure_future(self._call_async(prompt, schema, deadline))}
+        try:
+            delay = self.hedge_delay() if hedge else None
+            if delay is not None and start + delay < deadline:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    self._hedged()
+                    pending.add(asyncio.ensure_future(self._call_async(prompt, schema, deadline)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0, deadline - time.monotonic()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise LLMUnavailable(f"no reply within {deadline - start:.1f}s")
+                for task in done:
+                    if task.exception() is None:
+                        self._record(time.monotonic() - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_async(self, prompt, schema=None, hedge=False):
+        """generate() on the async client; losing hedges are cancelled"""
+        with self._span("generate_async", prompt, schema, hedge=hedge) as span:
+            text = await self._generate_async(prompt, schema, hedge)
+            self._count(span, text)
+            return text
+
+    async def _generate_async(self, prompt, schema, hedge):
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            if time.monotonic() >= deadline:
+                raise LLMUnavailable("deadline exceeded")
+            try:
+                return await self._attempt_async(prompt, schema, deadline, hedge)
+            except LLMUnavailable:
+                raise
+            except Exception as e:
+                attempt += 1
+                await asyncio.sleep(self._backoff(attempt, e, deadline))
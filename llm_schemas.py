@@ -0,0 +1,100 @@
+import json
+import re
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+
+# Leftover markdown fences, in case a reply arrives unconstrained (e.g. from the cache)
+FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+INTENTS = (
+    "register", "cancel", "seats_left", "show_events", "my_bookings", "recommend", "compare",
+    "schedule_check", "suggest_by_date", "auto_book", "overbooking_check", "seat_report",
+    "cluster", "forecast", "notifications", "conversational",
+)
+
+
+# ----------------- Response Schemas -----------------
+# Passed to the model as response_schema and used to validate what comes
+# back. Field order is the order the model writes them in.
+class IntentChoice(BaseModel):
+    intent: Literal[INTENTS]
+    event: Optional[str] = None
+    event2: Optional[str] = None
+    date: Optional[str] = None
+    preferences: Optional[str] = None
+    response: Optional[str] = None
+
+
+class Recommendation(BaseModel):
+    event_name: str
+    reason: str
+
+
+class Recommendations(BaseModel):
+    recommendations: List[Recommendation]
+
+
+class Suggestion(BaseModel):
+    event_name: str
+    date: str
+    reason: str
+
+
+class Suggestions(BaseModel):
+    suggestions: List[Suggestion]
+
+
+class Forecast(BaseModel):
+    predicted_attendance_pct: int
+    confidence: Literal["high", "medium", "low"]
+    insights: str
+    recommendation: str
+
+
+class Cluster(BaseModel):
+    category: str
+    events: List[str]
+
+
+class Clusters(BaseModel):
+    # Response schemas can't express free-form object keys, so categories
+    # come back as a list
+    clusters: List[Cluster]
+
+
+# ----------------- Parsing -----------------
+def parse_structured(text, schema):
+    """Validate a model reply against schema and return it as a dict.
+
+    Raises ValueError (JSONDecodeError or pydantic's ValidationError) when
+    the reply does not fit.
+    """
+    return schema.model_validate_json(FENCE.sub("", text)).model_dump()
+
+
+def partial_string_field(text, field):
+    """Decoded value of a string field in incomplete JSON, as far as it goes.
+
+    Returns None until the field's opening quote has arrived. Used to
+    stream one field of a structured reply while the rest is still being
+    generated.
+    """
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(field), text)
+    if match is None:
+        return None
+    start = pos = match.end()
+    while pos < len(text):
+        char = text[pos]
+        if char == '"':
+            break
+        if char == '\\':
+            width = 6 if text[pos + 1:pos + 2] == 'u' else 2
+            if pos + width > len(text):
+                break
+            pos += width
+        else:
+            pos += 1
+    try:
+        return json.loads('"' + text[start:pos] + '"')
+    except ValueError:
+        return None
@@ -1,16 +1,17 @@
-from google import genai
+import os
+from llm_backends import make_backend
 
 
 # 🔑 Put your Gemini API key directly here
 api_key = "api"
 
-# Initialize the client with the key
-client = genai.Client(api_key=api_key)
+# Initialize the backend (LLM_BACKEND=stub or replay runs offline)
+backend = make_backend(os.environ.get("LLM_BACKEND", "gemini").lower(), api_key=api_key)
 # Generate content using Gemini
-response = client.models.generate_content(
+response = backend.generate(
     model="gemini-2.5-flash",
-    contents="Explain how AI works in a few words"
+    prompt="Explain how AI works in a few words"
 )
 
 # Print the result
-print(response.text)
+print(response)
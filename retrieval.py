@@ -0,0 +1,103 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, namedtuple
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+# One build of the index; replaced whole, never modified
+RetrievalIndex = namedtuple('RetrievalIndex', 'rows idf postings dates date_order sorted_dates')
+
+
+def tokenize(text):
+    return TOKEN.findall(str(text).lower())
+
+
+class EventRetriever:
+    """TF-IDF index over EventName and Venue for picking prompt candidates.
+
+    The index is rebuilt lazily whenever the store's catalog is reloaded
+    (event_rows() returns a new sequence) and published as one
+    RetrievalIndex, so a query never mixes two builds. Scoring is cosine
+    similarity between the query and each event's name/venue tokens;
+    events with no overlap keep catalog date order so an empty query
+    still returns a sensible shortlist.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._index_state = None
+
+    def _build(self, rows):
+        doc_freq = Counter()
+        doc_tokens = []
+        dates = []
+        for event in rows:
+            tokens = Counter(tokenize(f"{event['EventName']} {event['Venue']}"))
+            doc_tokens.append(tokens)
+            doc_freq.update(tokens.keys())
+            dates.append(str(event['Date']))
+        n = len(doc_tokens)
+        idf = {token: math.log((1 + n) / (1 + df)) + 1 for token, df in doc_freq.items()}
+        postings = {}
+        for pos, tokens in enumerate(doc_tokens):
+            weights = {t: (1 + math.log(c)) * idf[t] for t, c in tokens.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for token, weight in weights.items():
+                postings.setdefault(token, []).append((pos, weight / norm))
+        date_order = sorted(range(n), key=dates.__getitem__)
+        return RetrievalIndex(rows, idf, postings, dates, date_order, [dates[pos] for pos in date_order])
+
+    def _index(self):
+        rows = self.store.event_rows()
+        index = self._index_state
+        if index is None or index.rows is not rows:
+            with self._lock:
+                index = self._index_state
+                if index is None or index.rows is not rows:
+                    index = self._index_state = self._build(rows)
+        return index
+
+    def top_k(self, query="", k=25, date_from=None, date_to=None, available_only=False):
+        """Up to k event rows ranked by relevance to query, after filters.
+
+        date_from/date_to are inclusive ISO dates; available_only drops
+        events with no seats left.
+        """
+        index = self._index()
+        scores = Counter()
+        for token in set(tokenize(query)):
+            for pos, weight in index.postings.get(token, ()):
+                scores[pos] += weight * index.idf[token]
+
+        result = []
+
+        def take(pos):
+            """Add the event at pos unless it is full; True once k are taken"""
+            event = index.rows[pos]
+            if available_only and self.store.seats_left(event['EventID']) <= 0:
+                return False
+            result.append(event)
+            return len(result) >= k
+
+        # Scored events in the window, best first. Only the top ones are
+        # sorted, more at a time if full events had to be skipped.
+        candidates = [pos for pos in scores
+                      if (not date_from or index.dates[pos] >= date_from)
+                      and (not date_to or index.dates[pos] <= date_to)]
+        done, want = 0, k
+        while done < len(candidates):
+            for pos in heapq.nlargest(want, candidates, key=scores.__getitem__)[done:]:
+                if take(pos):
+                    return result
+            done, want = want, want * 4
+        # Unscored events follow in date order, within the window
+        start = bisect_left(index.sorted_dates, date_from) if date_from else 0
+        stop = bisect_right(index.sorted_dates, date_to) if date_to else len(index.sorted_dates)
+        for pos in index.date_order[start:stop]:
+            if pos not in scores and take(pos):
+                break
+        return result
@@ -0,0 +1,96 @@
+import os
+import threading
+import telemetry
+from telemetry import log
+
+SNAPSHOT_FILES = {f"{name}{ext}" for name in ('Events', 'Attendee', 'Bookings') for ext in ('.csv', '.arrow')}
+
+
+class SnapshotWatcher:
+    """Reload an EventStore when its snapshot files are changed on disk.
+
+    File events only start a short debounce timer; when it fires the
+    store compares the files with the ones it last loaded or wrote
+    (store.snapshot_changed()), so compactions don't cause a reload but
+    an edited Events.csv does. While a compaction is writing, or a
+    reload is already running, the check is put off rather than stacked.
+    Readers keep using the current snapshot until the new one is
+    swapped in, and never touch the disk themselves.
+    """
+
+    def __init__(self, store, debounce=0.5):
+        self.store = store
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._reloading = threading.Lock()
+        self._timer = None
+        self._observer = None
+
+    def start(self):
+        """Start watching; False if watchdog is missing or the folder can't be watched"""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            log.warning("watchdog is not installed; edits to %s need a restart", self.store.csv_path)
+            return False
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = (event.src_path, getattr(event, 'dest_path', '') or '')
+                if any(os.path.basename(os.fsdecode(path)) in SNAPSHOT_FILES for path in paths):
+                    watcher._schedule()
+
+        observer = Observer()
+        observer.daemon = True
+        try:
+            observer.schedule(Handler(), self.store.csv_path, recursive=False)
+            observer.start()
+        except OSError as e:
+            log.warning("Cannot watch %s: %s", self.store.csv_path, e)
+            return False
+        self._observer = observer
+        return True
+
+    def stop(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def _schedule(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._check)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _check(self):
+        if not self._reloading.acquire(blocking=False):
+            # The running reload may have read the files before this change
+            self._schedule()
+            return
+        try:
+            if self.store.compacting():
+                # Half-written snapshots; look again once it's done
+                self._schedule()
+                return
+            if not self.store.snapshot_changed():
+                return
+            log.info("Snapshot files in %s changed; reloading", self.store.csv_path)
+            try:
+                self.store.reload()
+            except (OSError, ValueError, KeyError) as e:
+                # Usually a file caught mid-write; the next event retries
+                log.warning("Reload of %s failed: %s", self.store.csv_path, e)
+                telemetry.metrics.inc('store_reloads_total', result='error')
+                return
+            telemetry.metrics.inc('store_reloads_total', result='ok')
+        finally:
+            self._reloading.release()
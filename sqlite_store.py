@@ -0,0 +1,275 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+import telemetry
+from booking_table import BOOKING_COLUMNS
+from event_store import CatalogSnapshot, EventCatalog, ATTENDEE_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS Events (
+    EventID TEXT PRIMARY KEY,
+    EventName TEXT NOT NULL,
+    Date TEXT,
+    Time TEXT,
+    Venue TEXT,
+    Capacity INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS Attendee (
+    AttendeeID TEXT PRIMARY KEY,
+    Name TEXT,
+    Email TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS Bookings (
+    BookingID TEXT PRIMARY KEY,
+    AttendeeID TEXT NOT NULL,
+    EventID TEXT NOT NULL,
+    Status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS IdCounters (
+    Name TEXT PRIMARY KEY,
+    Value INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attendee_email ON Attendee(Email);
+CREATE INDEX IF NOT EXISTS idx_bookings_event_status ON Bookings(EventID, Status);
+CREATE INDEX IF NOT EXISTS idx_bookings_attendee_status ON Bookings(AttendeeID, Status);
+"""
+
+
+class SQLiteEventStore(EventCatalog):
+    """EventStore backed by a local SQLite database.
+
+    Attendee and booking lookups are indexed SQL queries, and
+    reserve_seat runs the capacity check and the insert in one
+    BEGIN IMMEDIATE transaction. The event catalog is small and read
+    constantly, so it is cached in memory like EventStore does.
+    """
+
+    def __init__(self, db_path, csv_path=None):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._catalog_version = 0
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        if csv_path and conn.execute("SELECT COUNT(*) FROM Events").fetchone()[0] == 0:
+            self.import_csv(csv_path)
+        self.reload()
+
+    def _conn(self):
+        """One connection per thread (Streamlit serves sessions on threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @property
+    def version(self):
+        """Data version, bumped by every write transaction from any process"""
+        row = self._conn().execute("SELECT Value FROM IdCounters WHERE Name = 'DataVersion'").fetchone()
+        return (self._catalog_version, row[0] if row else 0)
+
+    def _bump_version(self, conn):
+        conn.execute("INSERT INTO IdCounters (Name, Value) VALUES ('DataVersion', 1) "
+                     "ON CONFLICT(Name) DO UPDATE SET Value = Value + 1")
+
+    def _rows(self, sql, params=()):
+        return [dict(row) for row in self._conn().execute(sql, params)]
+
+    def reload(self):
+        """Reload the cached event catalog"""
+        self._catalog_version += 1
+        self.catalog = CatalogSnapshot(pd.read_sql_query("SELECT * FROM Events ORDER BY rowid", self._conn()),
+                                       self._catalog_version)
+
+    # ----------------- CSV import / export -----------------
+    def import_csv(self, csv_path):
+        """Replace all tables with the contents of Events/Attendee/Bookings.csv"""
+        with telemetry.span("store.read_csv", path=csv_path) as span:
+            events = pd.read_csv(os.path.join(csv_path, 'Events.csv'))
+            attendees = pd.read_csv(os.path.join(csv_path, 'Attendee.csv'))
+            bookings = pd.read_csv(os.path.join(csv_path, 'Bookings.csv'))
+            span.set(rows=len(events) + len(attendees) + len(bookings))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM IdCounters WHERE Name != 'DataVersion'")
+            for table, df in (('Events', events), ('Attendee', attendees), ('Bookings', bookings)):
+                conn.execute(f"DELETE FROM {table}")
+                placeholders = ", ".join("?" for _ in df.columns)
+                conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(df.columns)}) VALUES ({placeholders})",
+                    df.astype(object).itertuples(index=False, name=None)
+                )
+            self._bump_version(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def export_csv(self, csv_path):
+        """Write the three tables back out as CSV files"""
+        conn = self._conn()
+        with telemetry.span("store.write_csv", path=csv_path):
+            pd.read_sql_query("SELECT * FROM Events ORDER BY rowid", conn).to_csv(
+                os.path.join(csv_path, 'Events.csv'), index=False)
+            self.attendees_frame().to_csv(os.path.join(csv_path, 'Attendee.csv'), index=False)
+            self.bookings_frame().to_csv(os.path.join(csv_path, 'Bookings.csv'), index=False)
+
+    # ----------------- Lookups -----------------
+    def attendee_by_email(self, email):
+        """Attendee row dict for an email, or None"""
+        rows = self._rows("SELECT * FROM Attendee WHERE Email = ? ORDER BY rowid LIMIT 1", (email,))
+        return rows[0] if rows else None
+
+    def bookings_for_attendee(self, attendee_id, status=None):
+        """Bookings of one attendee, optionally filtered by status"""
+        if status is None:
+            return self._rows("SELECT * FROM Bookings WHERE AttendeeID = ? ORDER BY rowid", (attendee_id,))
+        return self._rows("SELECT * FROM Bookings WHERE AttendeeID = ? AND Status = ? ORDER BY rowid",
+                          (attendee_id, status))
+
+    def bookings_for_event(self, event_id, status=None):
+        """Bookings of one event, optionally filtered by status"""
+        if status is None:
+            return self._rows("SELECT * FROM Bookings WHERE EventID = ? ORDER BY rowid", (event_id,))
+        return self._rows("SELECT * FROM Bookings WHERE EventID = ? AND Status = ? ORDER BY rowid",
+                          (event_id, status))
+
+    def registered_count(self, event_id):
+        """Number of Registered bookings for an event"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM Bookings WHERE EventID = ? AND Status = 'Registered'", (event_id,)
+        ).fetchone()[0]
+
+    def registered_counts(self):
+        """Registered bookings per EventID"""
+        return dict(self._conn().execute(
+            "SELECT EventID, COUNT(*) FROM Bookings WHERE Status = 'Registered' GROUP BY EventID"
+        ).fetchall())
+
+    def find_booking(self, attendee_id, event_id, status=None):
+        """First booking of an attendee for an event, or None"""
+        sql = "SELECT * FROM Bookings WHERE AttendeeID = ? AND EventID = ?"
+        params = [attendee_id, event_id]
+        if status is not None:
+            sql += " AND Status = ?"
+            params.append(status)
+        rows = self._rows(sql + " ORDER BY rowid LIMIT 1", params)
+        return rows[0] if rows else None
+
+    # ----------------- Writes -----------------
+    def _next_id(self, conn, table, column, prefix):
+        """Next monotonic ID from IdCounters; BEGIN IMMEDIATE serializes callers.
+
+        The counter is seeded from the highest existing ID the first time
+        a table allocates, so imported rows are never reused.
+        """
+        row = conn.execute("SELECT Value FROM IdCounters WHERE Name = ?", (table,)).fetchone()
+        if row is None:
+            last = conn.execute(
+                f"SELECT MAX(CAST(SUBSTR({column}, ?) AS INTEGER)) FROM {table}", (len(prefix) + 1,)
+            ).fetchone()[0] or 0
+        else:
+            last = row[0]
+        conn.execute("INSERT OR REPLACE INTO IdCounters (Name, Value) VALUES (?, ?)", (table, last + 1))
+        return f"{prefix}{last + 1:03}"
+
+    def add_attendee(self, name, email):
+        """Return the attendee for an email, creating it if new"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = conn.execute("SELECT * FROM Attendee WHERE Email = ? ORDER BY rowid LIMIT 1",
+                                    (email,)).fetchone()
+            if existing is not None:
+                conn.execute("ROLLBACK")
+                return dict(existing)
+            attendee = {'AttendeeID': self._next_id(conn, 'Attendee', 'AttendeeID', 'A'), 'Name': name, 'Email': email}
+            conn.execute("INSERT INTO Attendee (AttendeeID, Name, Email) VALUES (?, ?, ?)",
+                         (attendee['AttendeeID'], name, email))
+            self._bump_version(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return attendee
+
+    def _insert_booking(self, conn, attendee_id, event_id):
+        booking = {
+            'BookingID': self._next_id(conn, 'Bookings', 'BookingID', 'B'),
+            'AttendeeID': attendee_id,
+            'EventID': event_id,
+            'Status': 'Registered'
+        }
+        conn.execute("INSERT INTO Bookings (BookingID, AttendeeID, EventID, Status) VALUES (?, ?, ?, ?)",
+                     (booking['BookingID'], attendee_id, event_id, 'Registered'))
+        self._bump_version(conn)
+        return booking
+
+    def add_booking(self, attendee_id, event_id):
+        """Create a Registered booking without a capacity check"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            booking = self._insert_booking(conn, attendee_id, event_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return booking
+
+    def reserve_seat(self, attendee_id, event_id):
+        """Check for a duplicate and a free seat, then book, in one transaction.
+
+        Returns (status, booking) where status is 'booked', 'duplicate'
+        or 'full'.
+        """
+        event = self.event_by_id(event_id)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = conn.execute(
+                "SELECT * FROM Bookings WHERE AttendeeID = ? AND EventID = ? AND Status = 'Registered' LIMIT 1",
+                (attendee_id, event_id)
+            ).fetchone()
+            if existing is not None:
+                conn.execute("ROLLBACK")
+                return 'duplicate', dict(existing)
+            booked = conn.execute(
+                "SELECT COUNT(*) FROM Bookings WHERE EventID = ? AND Status = 'Registered'", (event_id,)
+            ).fetchone()[0]
+            if booked >= int(event['Capacity']):
+                conn.execute("ROLLBACK")
+                return 'full', None
+            booking = self._insert_booking(conn, attendee_id, event_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return 'booked', booking
+
+    def set_booking_status(self, booking, status):
+        """Change a booking's status"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE Bookings SET Status = ? WHERE BookingID = ?", (status, booking['BookingID']))
+            self._bump_version(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        booking['Status'] = status
+
+    # ----------------- Export -----------------
+    def attendees_frame(self):
+        """Current attendees as a DataFrame"""
+        return pd.read_sql_query("SELECT * FROM Attendee ORDER BY rowid", self._conn())[ATTENDEE_COLUMNS]
+
+    def bookings_frame(self):
+        """Current bookings as a DataFrame"""
+        return pd.read_sql_query("SELECT * FROM Bookings ORDER BY rowid", self._conn())[BOOKING_COLUMNS]
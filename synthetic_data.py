@@ -0,0 +1,136 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+TOPICS = [
+    "AI", "Robotics", "Data Science", "Cloud", "Security", "Blockchain", "Design", "Marketing",
+    "Finance", "Startup", "Music", "Film", "Photography", "Health", "Climate", "Gaming",
+    "Quantum", "Web", "Mobile", "Leadership",
+]
+KINDS = ["Workshop", "Expo", "Seminar", "Summit", "Meetup", "Conference", "Bootcamp", "Hackathon", "Festival", "Panel"]
+VENUES = [f"Hall {letter}" for letter in "ABCDEFGH"] + [f"Room {n}" for n in range(101, 113)] + ["Auditorium", "Rooftop"]
+TIMES = ["09:00", "10:00", "11:00", "13:00", "14:00", "15:00", "16:00", "18:00", "19:00"]
+FIRST_NAMES = [
+    "John", "Jane", "Badal", "Priya", "Wei", "Maria", "Ahmed", "Olivia", "Kenji", "Fatima",
+    "Liam", "Sofia", "Arjun", "Chloe", "Mateo", "Aisha", "Noah", "Yuki", "Elena", "Omar",
+]
+LAST_NAMES = [
+    "Doe", "Smith", "Singh", "Patel", "Zhang", "Garcia", "Khan", "Brown", "Tanaka", "Ali",
+    "Johnson", "Rossi", "Kumar", "Martin", "Lopez", "Okafor", "Wilson", "Sato", "Petrova", "Haddad",
+]
+
+
+def _ids(prefix, start, count):
+    """IDs like EventStore allocates them: prefix plus a number padded to 3 digits"""
+    return prefix + pd.Series(np.arange(start, start + count)).astype(str).str.zfill(3)
+
+
+def _zipf_weights(count, skew, rng):
+    """Popularity weights falling off as 1/rank**skew, in random rank order"""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+# State the stores derive from the CSVs; left behind, it would be loaded
+# over (journal, Arrow snapshots) or instead of (events.db) the new data
+DERIVED_FILES = ['Bookings.journal', 'Bookings.compacted', 'Events.arrow', 'Attendee.arrow', 'Bookings.arrow',
+                 'events.db', 'events.db-journal', 'events.db-wal', 'events.db-shm']
+
+
+def generate(out_dir, events=1000, attendees=10000, bookings=100000, skew=1.1, attendee_skew=0.6,
+             cancel_rate=0.1, start_date="2025-10-01", days=365, seed=42):
+    """Write Events.csv, Attendee.csv and Bookings.csv to out_dir.
+
+    Event popularity follows a Zipf-like distribution with exponent skew
+    and attendee activity one with attendee_skew (0 is uniform). Each
+    attendee books an event at most once, so very skewed settings can
+    produce fewer bookings than asked for. cancel_rate of bookings are
+    Canceled, and every event's capacity covers its Registered bookings.
+    Journals, Arrow snapshots and SQLite databases from earlier data in
+    out_dir are deleted. Returns the (events, attendees, bookings) row
+    counts written.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    for name in DERIVED_FILES:
+        try:
+            os.remove(os.path.join(out_dir, name))
+        except FileNotFoundError:
+            pass
+
+    # Events: unique "<Topic> <Kind>" names, numbered once combinations run out
+    names = (pd.Series(np.array(TOPICS)[rng.integers(0, len(TOPICS), events)]) + " "
+             + pd.Series(np.array(KINDS)[rng.integers(0, len(KINDS), events)]))
+    repeat = names.groupby(names).cumcount()
+    names = names.where(repeat == 0, names + " " + (repeat + 1).astype(str))
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, days, events), unit='D')
+    events_df = pd.DataFrame({
+        'EventID': _ids('E', 101, events),
+        'EventName': names,
+        'Date': dates.strftime('%Y-%m-%d'),
+        'Time': np.array(TIMES)[rng.integers(0, len(TIMES), events)],
+        'Venue': np.array(VENUES)[rng.integers(0, len(VENUES), events)],
+        'Capacity': np.clip(rng.lognormal(4.5, 1.0, events), 20, 5000).astype(int),
+    })
+
+    first = np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), attendees)]
+    last = np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), attendees)]
+    attendee_ids = _ids('A', 1, attendees)
+    attendees_df = pd.DataFrame({
+        'AttendeeID': attendee_ids,
+        'Name': pd.Series(first) + " " + pd.Series(last),
+        'Email': (pd.Series(first).str.lower() + "." + pd.Series(last).str.lower()
+                  + attendee_ids.str[1:] + "@example.com"),
+    })
+
+    # Bookings: skewed (attendee, event) pairs, one per pair; repeated
+    # pairs are dropped and redrawn
+    attendee_weights = _zipf_weights(attendees, attendee_skew, rng)
+    event_weights = _zipf_weights(events, skew, rng)
+    pairs = pd.DataFrame({'attendee': [], 'event': []}, dtype=np.int64)
+    for _ in range(20):
+        needed = bookings - len(pairs)
+        if needed <= 0:
+            break
+        draw = int(needed * 1.1) + 16
+        pairs = pd.concat([pairs, pd.DataFrame({
+            'attendee': rng.choice(attendees, draw, p=attendee_weights),
+            'event': rng.choice(events, draw, p=event_weights),
+        })]).drop_duplicates()
+    pairs = pairs.iloc[:bookings]
+    status = np.where(rng.random(len(pairs)) < cancel_rate, 'Canceled', 'Registered')
+    bookings_df = pd.DataFrame({
+        'BookingID': _ids('B', 1, len(pairs)),
+        'AttendeeID': attendee_ids.values[pairs['attendee'].values],
+        'EventID': events_df['EventID'].values[pairs['event'].values],
+        'Status': status,
+    })
+
+    registered = np.bincount(pairs['event'].values[status == 'Registered'], minlength=events)
+    headroom = np.ceil(registered * rng.uniform(1.0, 1.3, events)).astype(int)
+    events_df['Capacity'] = np.maximum(events_df['Capacity'].values, headroom)
+
+    events_df.to_csv(os.path.join(out_dir, 'Events.csv'), index=False)
+    attendees_df.to_csv(os.path.join(out_dir, 'Attendee.csv'), index=False)
+    bookings_df.to_csv(os.path.join(out_dir, 'Bookings.csv'), index=False)
+    return len(events_df), len(attendees_df), len(bookings_df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Events/Attendee/Bookings CSVs")
+    parser.add_argument("out_dir")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--attendees", type=int, default=10000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for event popularity (0 = uniform)")
+    parser.add_argument("--attendee-skew", type=float, default=0.6, help="Zipf exponent for attendee activity")
+    parser.add_argument("--cancel-rate", type=float, default=0.1)
+    parser.add_argument("--start-date", default="2025-10-01")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    counts = generate(args.out_dir, args.events, args.attendees, args.bookings, args.skew,
+                      args.attendee_skew, args.cancel_rate, args.start_date, args.days, args.seed)
+    print("Wrote %d events, %d attendees, %d bookings to %s" % (counts + (args.out_dir,)))
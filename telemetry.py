@@ -0,0 +1,308 @@
+import contextvars
+import cProfile
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger("event_agent")
+
+# Span open in the current thread / task, parent of the next one opened
+_current_span = contextvars.ContextVar('telemetry_span', default=None)
+_profiling = contextvars.ContextVar('telemetry_profiling', default=False)
+_ids = itertools.count(1)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token); no tokenizer needed"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+# ----------------- Metrics -----------------
+class Metrics:
+    """Counters and histograms keyed by metric name and label values"""
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.BUCKETS), 0, 0.0]
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += 1
+            histogram[2] += value
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def prometheus_text(self):
+        """Everything recorded so far in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(b), n, s)) for key, (b, n, s) in self._histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), (buckets, count, total) in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, hits in zip(self.BUCKETS, buckets):
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', f'{bound:g}')])} {hits}")
+            lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total:g}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Counters and histogram count/sum as plain dicts (for JSON)"""
+        with self._lock:
+            return {
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                'histograms': [{'name': name, 'labels': dict(labels), 'count': n, 'sum': s}
+                               for (name, labels), (_, n, s) in sorted(self._histograms.items())],
+            }
+
+
+# ----------------- Tracing -----------------
+class Span:
+    """One timed operation; attrs are free-form key/values set while it runs"""
+
+    __slots__ = ('name', 'span_id', 'parent_id', 'trace_id', 'start', 'duration', 'attrs', 'error')
+
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.span_id = next(_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.start = time.time()
+        self.duration = None
+        self.attrs = attrs
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            'trace': self.trace_id,
+            'span': self.span_id,
+            'parent': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'ms': round(self.duration * 1000, 3),
+            'error': self.error,
+            'attrs': self.attrs,
+        }
+
+
+class Tracer:
+    """Nested spans, each also recorded in metrics as span_seconds{span=...}.
+
+    Finished spans are kept in a ring buffer of max_spans. With path set
+    they are also appended there as JSON lines by a background thread, so
+    requests never wait on the file.
+    """
+
+    def __init__(self, metrics, max_spans=2000, path=None):
+        self.metrics = metrics
+        self.path = path
+        self._finished = deque(maxlen=max_spans)
+        self._queue = None
+        if path:
+            self._queue = queue.SimpleQueue()
+            threading.Thread(target=self._write_spans, name='telemetry-spans', daemon=True).start()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        span = Span(name, _current_span.get(), attrs)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                span.error = type(e).__name__
+                self.metrics.inc('errors_total', span=name, error=span.error)
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A generator closed from another context; nothing to restore
+                pass
+            self.metrics.observe('span_seconds', span.duration, span=name)
+            record = span.to_dict()
+            self._finished.append(record)
+            if self._queue is not None:
+                self._queue.put(record)
+
+    def traced(self, name):
+        """Decorator: run each call (sync or async) in a span called name"""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def spans(self):
+        return list(self._finished)
+
+    def json_lines(self):
+        return "".join(json.dumps(record, default=str) + "\n" for record in self.spans())
+
+    def _write_spans(self):
+        while True:
+            records = [self._queue.get()]
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.writelines(json.dumps(record, default=str) + "\n" for record in records)
+            except OSError as e:
+                log.warning("Span export to %s failed: %s", self.path, e)
+
+
+def record_error(span, error):
+    """Mark a span failed for an exception its code caught and handled"""
+    span.error = type(error).__name__
+    metrics.inc('errors_total', span=span.name, error=span.error)
+
+
+# ----------------- Profiling -----------------
+PROFILER = os.environ.get("EVENT_PROFILE", "").lower()
+PROFILE_DIR = os.environ.get("EVENT_PROFILE_DIR", "profiles")
+
+
+@contextmanager
+def profiled(name):
+    """Profile the block when EVENT_PROFILE is "cprofile" or "pyinstrument".
+
+    Reports go to EVENT_PROFILE_DIR, one file per outermost block
+    (<name>-<timestamp>.prof for cProfile, .html for pyinstrument).
+    Nested blocks run under their caller's profiler.
+    """
+    if PROFILER not in ("cprofile", "pyinstrument") or _profiling.get():
+        yield
+        return
+    token = _profiling.set(True)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{next(_ids)}")
+    profiler = None
+    if PROFILER == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler(async_mode='disabled')
+        except ImportError:
+            log.warning("pyinstrument is not installed; using cProfile")
+    try:
+        if profiler is not None:
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with open(path + ".html", 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                profile.dump_stats(path + ".prof")
+    finally:
+        try:
+            _profiling.reset(token)
+        except ValueError:
+            pass
+
+
+# ----------------- Export -----------------
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /spans (JSON lines) from a daemon thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics"):
+                body, kind = metrics.prometheus_text(), "text/plain; version=0.0.4"
+            elif self.path.startswith("/spans"):
+                body, kind = tracer.json_lines(), "application/x-ndjson"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='telemetry-http', daemon=True).start()
+    return server
+
+
+metrics = Metrics()
+tracer = Tracer(metrics, path=os.environ.get("TELEMETRY_SPANS_FILE") or None)
+span = tracer.span
+traced = tracer.traced
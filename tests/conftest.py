@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EVENTS = """EventID,EventName,Date,Time,Venue,Capacity
+E101,AI Workshop,2025-10-05,10:00,Hall A,30
+E102,Robotics Expo,2025-10-15,14:00,Hall B,1000
+"""
+ATTENDEES = """AttendeeID,Name,Email
+A001,John Doe,john@example.com
+A002,Jane Smith,jane@example.com
+"""
+BOOKINGS = """BookingID,AttendeeID,EventID,Status
+B001,A001,E101,Registered
+B002,A002,E102,Registered
+"""
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A small catalog: E101 has 30 seats (one taken), E102 has 1000"""
+    for name, text in (('Events', EVENTS), ('Attendee', ATTENDEES), ('Bookings', BOOKINGS)):
+        (tmp_path / f"{name}.csv").write_text(text, encoding='utf-8')
+    return str(tmp_path)
@@ -0,0 +1,169 @@
+import multiprocessing
+import os
+import threading
+import pytest
+from event_store import EventStore, IdAllocator
+from file_lock import FileLock
+
+
+def table(store):
+    """(attendees, bookings) as sorted plain tuples, for comparing stores"""
+    attendees = store.attendees_frame()
+    bookings = store.bookings_frame().astype(str)
+    return (sorted(attendees.itertuples(index=False, name=None)),
+            sorted(bookings.itertuples(index=False, name=None)))
+
+
+# ----------------- Journal -----------------
+def test_replay_is_idempotent(data_dir):
+    store = EventStore(data_dir)
+    attendee = store.add_attendee("Ada Lovelace", "ada@example.com")
+    booking = store.add_booking(attendee['AttendeeID'], 'E101')
+    store.add_booking(attendee['AttendeeID'], 'E102')
+    store.set_booking_status(booking, 'Cancelled')
+    expected = table(store)
+
+    for entry, _ in store.journal.replay():
+        store._apply(entry)
+    assert table(store) == expected
+    assert store.registered_count('E101') == 1
+
+    store.reload()
+    assert table(store) == expected
+    assert table(EventStore(data_dir)) == expected
+
+
+def test_torn_final_line_is_ignored(data_dir):
+    store = EventStore(data_dir)
+    attendee = store.add_attendee("Ada Lovelace", "ada@example.com")
+    store.add_booking(attendee['AttendeeID'], 'E101')
+    expected = table(store)
+    with open(store.journal.path, 'ab') as f:
+        f.write(b'{"op": "book", "BookingID": "B9')
+    assert table(EventStore(data_dir)) == expected
+
+
+# ----------------- Compaction -----------------
+@pytest.mark.parametrize('snapshot_format', ['csv', 'arrow'])
+def test_compaction_keeps_concurrent_writes(data_dir, snapshot_format):
+    compactor = EventStore(data_dir, snapshot_format)
+    writer = EventStore(data_dir, snapshot_format)
+    done = threading.Event()
+
+    def write():
+        try:
+            for i in range(200):
+                attendee = writer.add_attendee(f"Writer {i}", f"writer{i}@example.com")
+                writer.add_booking(attendee['AttendeeID'], 'E102')
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    compactions = 0
+    while not done.is_set():
+        compactor.add_attendee(f"Compactor {compactions}", f"compactor{compactions}@example.com")
+        compactor.compact()
+        compactions += 1
+    thread.join()
+    compactor.compact()
+
+    assert compactions > 1
+    assert os.path.getsize(compactor.journal.path) == 0
+    fresh = EventStore(data_dir, snapshot_format)
+    assert fresh.registered_count('E102') == 201
+    assert len(fresh.attendees_frame()) == 2 + 200 + compactions
+    # Writers that only saw the journal rotate under them agree with a fresh load
+    writer.add_attendee("Late", "late@example.com")
+    assert table(writer) == table(EventStore(data_dir, snapshot_format))
+
+
+def test_arrow_compaction_keeps_csv_current(data_dir):
+    store = EventStore(data_dir, 'arrow')
+    attendee = store.add_attendee("Ada Lovelace", "ada@example.com")
+    store.add_booking(attendee['AttendeeID'], 'E101')
+    store.compact()
+    expected = table(store)
+    # A checkout or editor save makes the CSV the newer file again
+    for name in ('Attendee', 'Bookings'):
+        os.utime(os.path.join(data_dir, f"{name}.csv"))
+    assert table(EventStore(data_dir, 'arrow')) == expected
+    assert table(EventStore(data_dir)) == expected
+
+
+def test_reload_after_compaction_by_another_store(data_dir):
+    first = EventStore(data_dir)
+    second = EventStore(data_dir)
+    attendee = first.add_attendee("Ada Lovelace", "ada@example.com")
+    first.add_booking(attendee['AttendeeID'], 'E101')
+    first.compact()
+    # second never saw the entries before they were folded away
+    second.reload()
+    assert table(second) == table(first)
+
+
+# ----------------- Several processes -----------------
+ATTEMPTS = 15
+
+
+def _book(data_dir, worker, start, results):
+    store = EventStore(data_dir)
+    start.wait()
+    statuses = []
+    for i in range(ATTEMPTS):
+        attendee = store.add_attendee(f"Worker {worker}.{i}", f"worker{worker}.{i}@example.com")
+        statuses.append(store.reserve_seat(attendee['AttendeeID'], 'E101')[0])
+        store.reserve_seat(attendee['AttendeeID'], 'E102')
+        if i % 5 == 0:
+            store.compact()
+    results.put(statuses)
+
+
+def test_processes_never_overbook_or_reuse_ids(data_dir):
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    results = context.Queue()
+    workers = [context.Process(target=_book, args=(data_dir, n, start, results)) for n in range(4)]
+    for process in workers:
+        process.start()
+    start.set()
+    statuses = [status for _ in workers for status in results.get(timeout=120)]
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    store = EventStore(data_dir)
+    # E101 had 30 seats, one already taken
+    assert statuses.count('booked') == 29
+    assert statuses.count('full') == len(statuses) - 29
+    assert store.registered_count('E101') == 30
+    assert store.registered_count('E102') == 1 + 4 * ATTEMPTS
+
+    attendee_ids = store.attendees_frame()['AttendeeID']
+    booking_ids = store.bookings_frame()['BookingID']
+    assert len(attendee_ids) == 2 + 4 * ATTEMPTS
+    assert attendee_ids.is_unique
+    assert booking_ids.is_unique
+    assert len(booking_ids) == 2 + 29 + 4 * ATTEMPTS
+
+
+# ----------------- IDs and locks -----------------
+def test_ids_skip_every_number_seen():
+    ids = IdAllocator('B')
+    ids.observe_all(['B001', 'B010', 'legacy-7'])
+    assert ids.next() == 'B011'
+    ids.observe('B050')
+    assert ids.next() == 'B051'
+    ids.observe('B020')
+    assert ids.next() == 'B052'
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    path = str(tmp_path / 'journal.lock')
+    held = FileLock(path)
+    held.acquire()
+    other = FileLock(path)
+    assert not other.acquire(blocking=False)
+    held.release()
+    assert other.acquire(blocking=False)
+    other.release()